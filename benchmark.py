@@ -0,0 +1,250 @@
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, List, Dict, Any, Optional
+
+from lhkpn_mock import DETAIL_PATH, SEARCH_PATH, MockPortal, load_templates, render_modal, synthesize_records
+from lhkpn_parse import CATEGORY_MAP, PARSER_BACKENDS, ParseStage, lxml, parse_detail
+from lhkpn_trace import Tracer
+
+logger = logging.getLogger("LHKPN_BENCH")
+
+QUERY = "Prabowo Subianto"
+
+
+def git_commit() -> Optional[str]:
+    """
+    Return the commit the benchmark runs on, if it runs in a git checkout.
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def peak_rss_mb() -> Dict[str, float]:
+    """
+    Return the peak resident set size of this process and of its finished children, in MiB.
+
+    The children include the browser once it has exited.
+    """
+    # ru_maxrss is in KiB on Linux and in bytes on macOS.
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "self": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1),
+        "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale, 1),
+    }
+
+
+def time_call(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """
+    Time a call `repeat` times after one warm-up call.
+
+    Returns:
+        Best, median and mean duration in milliseconds.
+    """
+    fn()
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append((time.perf_counter() - start) * 1000)
+    durations.sort()
+    return {
+        "best_ms": round(durations[0], 3),
+        "median_ms": round(durations[len(durations) // 2], 3),
+        "mean_ms": round(sum(durations) / len(durations), 3),
+        "runs": repeat,
+    }
+
+
+def modal_fixtures() -> Dict[str, Dict[str, Any]]:
+    """
+    Build the small, typical and pathological modals and the records they were rendered from.
+    """
+    templates = load_templates()
+    small = dict(templates[0], **{key: templates[0][key][:1] for key in CATEGORY_MAP.values()})
+    pathological = synthesize_records(QUERY, 1, templates, asset_rows=600)[0]
+    return {
+        "small": small,
+        "typical": templates[0],
+        "pathological": pathological,
+    }
+
+
+def bench_parse(repeat: int) -> Dict[str, Any]:
+    """
+    Time `parse_detail` per fixture and backend, asserting every backend returns the rendered assets.
+    """
+    backends = [b for b in PARSER_BACKENDS if b != "lxml" or lxml is not None]
+    results = {}
+    for size, record in modal_fixtures().items():
+        html = render_modal(record)
+        expected = {key: record[key] for key in CATEGORY_MAP.values()}
+        entry = {"html_bytes": len(html.encode("utf-8")),
+                 "asset_lines": sum(len(lines) for lines in expected.values())}
+        for backend in backends:
+            parsed = parse_detail(html, backend)
+            assert parsed == expected, f"{backend} parser output differs from the {size} fixture"
+            entry[backend] = time_call(lambda: parse_detail(html, backend), repeat)
+        results[size] = entry
+    return results
+
+
+async def bench_http(portal: MockPortal, max_results: int, parse_executor: str) -> Dict[str, Any]:
+    """
+    Time a full query through `PortalHTTPClient` against the mock, plus a single search page,
+    with the time spent per stage.
+    """
+    from lhkpn_http import PortalHTTPClient
+
+    base = portal.base_url
+    session = {
+        "cookies": [],
+        "headers": {},
+        "search": {"url": base + SEARCH_PATH, "method": "POST", "query": QUERY,
+                   "params": [("draw", "1"), ("start", "0"), ("length", "10"), ("CARI_NAMA", QUERY)]},
+        "detail": {"url": base + DETAIL_PATH, "method": "POST", "params": [("id", "")],
+                   "param_attrs": {"id": "data-id"}, "url_attrs": {}},
+    }
+    parser = ParseStage(parse_executor)
+    tracer = Tracer()
+    try:
+        async with PortalHTTPClient(session, parser=parser, tracer=tracer) as client:
+            start = time.perf_counter()
+            rows, _ = await client.search_page(QUERY, 0)
+            page_ms = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            records = await client.query(QUERY, max_results=max_results)
+            elapsed = time.perf_counter() - start
+    finally:
+        parser.shutdown()
+    return {
+        "search_page_ms": round(page_ms, 3),
+        "rows_per_page": len(rows),
+        "records": len(records),
+        "seconds": round(elapsed, 3),
+        "records_per_minute": round(len(records) / elapsed * 60, 1),
+        "stages": tracer.summary()["stages"],
+    }
+
+
+async def bench_browser(portal: MockPortal, max_results: int, repeat: int, scraper_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Time row harvesting and a full query in a real browser against the mock, with the time spent per stage.
+    """
+    from lhkpn_scraper import LHKPNSession
+
+    async with LHKPNSession(headless=True, base_url=portal.base_url, **scraper_kwargs) as session:
+        scraper = session.scraper
+        await scraper.submit_search(QUERY)
+        rows = await scraper.harvest_rows()
+        harvest = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            await scraper.harvest_rows()
+            harvest.append((time.perf_counter() - start) * 1000)
+        harvest.sort()
+
+        start = time.perf_counter()
+        records = [record async for record in session.iter_query(QUERY, max_results=max_results)]
+        elapsed = time.perf_counter() - start
+    return {
+        "harvest_rows": {"rows": len(rows), "best_ms": round(harvest[0], 3),
+                         "median_ms": round(harvest[len(harvest) // 2], 3), "runs": repeat},
+        "records": len(records),
+        "seconds": round(elapsed, 3),
+        "records_per_minute": round(len(records) / elapsed * 60, 1),
+        "detailed": sum(1 for r in records if any(r[key] for key in CATEGORY_MAP.values())),
+        "stages": scraper.tracer.summary()["stages"],
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], path: str = "") -> List[str]:
+    """
+    List the timing and throughput figures that changed between two benchmark results.
+    """
+    lines = []
+    for key, value in current.items():
+        old = baseline.get(key) if isinstance(baseline, dict) else None
+        name = f"{path}.{key}" if path else key
+        if isinstance(value, dict) and isinstance(old, dict):
+            lines.extend(compare(value, old, name))
+        elif (key.endswith(("_ms", "per_minute", "seconds")) and isinstance(value, (int, float))
+              and isinstance(old, (int, float)) and old):
+            change = (value - old) / old * 100
+            lines.append(f"{name}: {old} -> {value} ({change:+.1f}%)")
+    return lines
+
+
+async def run(args) -> Dict[str, Any]:
+    result = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {"repeat": args.repeat, "results": args.results, "latency": args.latency,
+                   "detail_workers": args.detail_workers, "parse_executor": args.parse_executor,
+                   "page_length": args.page_length},
+    }
+
+    logger.info("Benchmarking parse_detail...")
+    result["parse_detail"] = bench_parse(args.repeat)
+
+    with MockPortal(results=args.results, latency=args.latency, popups=1) as portal:
+        logger.info("Benchmarking the HTTP client against the mock portal...")
+        result["http"] = await bench_http(portal, args.results, args.parse_executor)
+
+        if args.skip_browser:
+            result["browser"] = {"skipped": "--skip-browser"}
+        else:
+            logger.info("Benchmarking the browser scraper against the mock portal...")
+            scraper_kwargs = {"detail_workers": args.detail_workers, "parse_executor": args.parse_executor,
+                              "page_length": args.page_length}
+            try:
+                result["browser"] = await bench_browser(portal, args.results, args.repeat, scraper_kwargs)
+            except Exception as e:
+                logger.error(f"Browser benchmark failed: {e}")
+                result["browser"] = {"error": str(e).splitlines()[0] if str(e) else type(e).__name__}
+
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark parsing and scraping throughput against a local mock portal.")
+    parser.add_argument("--output", default="benchmark.json", help="Where to write the results (default: benchmark.json).")
+    parser.add_argument("--compare", default=None, metavar="BASELINE", help="Print changes against an earlier results file.")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per micro-benchmark (default: 20).")
+    parser.add_argument("--results", type=int, default=100, help="Reports the mock portal returns per query (default: 100).")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds the mock portal adds to each request (default: 0).")
+    parser.add_argument("--detail-workers", type=int, default=1, help="Detail workers for the browser run (default: 1).")
+    parser.add_argument("--parse-executor", choices=["inline", "thread", "process"], default="inline", help="Parse stage for the end-to-end runs (default: inline).")
+    parser.add_argument("--page-length", type=int, default=None, help="Results page length for the browser run (default: portal default).")
+    parser.add_argument("--skip-browser", action="store_true", help="Skip the browser run, e.g. where Chromium is not installed.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    result = asyncio.run(run(args))
+    with open(args.output, "w") as f:
+        json.dump(result, f, indent=2)
+    logger.info(f"Results saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"Changes against {args.compare} ({baseline.get('commit')}):")
+        for line in compare(result, baseline):
+            print(f"  {line}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+from multiprocessing import Pool
+from typing import Dict, Any, Iterable, Iterator, Optional, Tuple
+
+from lhkpn_parse import parse_detail
+
+logger = logging.getLogger("LHKPNScraper")
+
+ARCHIVE_KEY = "modal_sha256"
+
+
+class ModalArchive:
+    """
+    Content-addressed store of raw detail modal HTML.
+
+    Each modal is gzip-compressed and stored under the SHA-256 of its HTML, so
+    identical modals are stored once and a record only needs to keep the digest
+    (under `modal_sha256`) to be re-parsed later.
+    """
+
+    def __init__(self, root: str):
+        """
+        Initialize the archive.
+
+        Args:
+            root: Directory holding the archive. Created if missing.
+        """
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, digest: str) -> str:
+        """
+        Return the file path of an archived modal.
+        """
+        return os.path.join(self.root, digest[:2], f"{digest}.html.gz")
+
+    def put(self, html: str) -> str:
+        """
+        Archive a modal's HTML.
+
+        Args:
+            html: Raw modal HTML.
+
+        Returns:
+            The SHA-256 hex digest the HTML is stored under.
+        """
+        raw = html.encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+        path = self.path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with gzip.open(tmp_path, "wb") as f:
+                f.write(raw)
+            os.replace(tmp_path, path)
+        return digest
+
+    def get(self, digest: str) -> str:
+        """
+        Read an archived modal's HTML.
+
+        Args:
+            digest: The SHA-256 hex digest returned by `put`.
+        """
+        with gzip.open(self.path(digest), "rb") as f:
+            return f.read().decode("utf-8")
+
+
+def read_records(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Read records from a JSON array file or a JSON Lines file.
+    """
+    with open(path, encoding="utf-8") as f:
+        first = f.read(1)
+        while first.isspace():
+            first = f.read(1)
+        f.seek(0)
+        if first == "[":
+            yield from json.load(f)
+            return
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _reparse_record(job: Tuple[Dict[str, Any], str, str]) -> Dict[str, Any]:
+    record, root, backend = job
+    digest = record.get(ARCHIVE_KEY)
+    if not digest:
+        return record
+    try:
+        html = ModalArchive(root).get(digest)
+    except OSError as e:
+        logger.error(f"Archived modal {digest} for {record.get('name')} is unavailable: {e}")
+        return record
+    record.update(parse_detail(html, backend))
+    return record
+
+
+def reparse_records(records: Iterable[Dict[str, Any]], archive: ModalArchive, backend: str = "bs4",
+                    processes: Optional[int] = None, chunksize: int = 16) -> Iterator[Dict[str, Any]]:
+    """
+    Re-run `parse_detail` over the archived modals of stored records.
+
+    Parsing is spread over a process pool; records come back in input order and
+    records without an archived modal are passed through unchanged.
+
+    Args:
+        records: Records carrying a `modal_sha256` digest.
+        archive: The archive the digests refer to.
+        backend: Parser backend, "bs4" or "lxml".
+        processes: Number of worker processes. Defaults to the number of CPUs.
+        chunksize: Records handed to a worker at a time.
+
+    Yields:
+        The records with their asset categories re-parsed.
+    """
+    jobs = ((record, archive.root, backend) for record in records)
+    with Pool(processes) as pool:
+        yield from pool.imap(_reparse_record, jobs, chunksize=chunksize)
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import time
+from typing import List, Dict, Any, AsyncIterator, Iterable, Optional, Union
+
+from playwright.async_api import async_playwright
+
+from lhkpn_metrics import Metrics
+from lhkpn_ratelimit import RateLimiter
+from lhkpn_scraper import LHKPNScraper, LHKPNSession
+
+logger = logging.getLogger("LHKPNScraper")
+
+
+def read_names(lines: Iterable[str]) -> List[str]:
+    """
+    Read query names, one per line, skipping blank lines and `#` comments.
+    """
+    names = []
+    for line in lines:
+        name = line.strip()
+        if name and not name.startswith("#"):
+            names.append(name)
+    return names
+
+
+class BatchRunner:
+    """
+    Runs a list of queries across several warm sessions sharing one browser.
+
+    Each session has its own browser context. A global rate limiter spaces out
+    query starts across all sessions, and results are yielded as each query
+    completes rather than in input order.
+    """
+
+    def __init__(self, concurrency: int = 2, rate: Optional[float] = None,
+                 max_results: Union[int, float] = float('inf'), with_details: bool = True, **scraper_kwargs):
+        """
+        Initialize the runner.
+
+        Args:
+            concurrency: Number of browser contexts running queries at once.
+            rate: Maximum number of queries started per second across all
+                contexts. None disables rate limiting.
+            max_results: Maximum records to scrape per query.
+            with_details: Whether to fetch each row's detail modal.
+            **scraper_kwargs: Arguments for each context's `LHKPNScraper`. All
+                contexts share one `metrics` instance, created if not given.
+        """
+        self.concurrency = concurrency
+        self.limiter = RateLimiter(rate) if rate else None
+        self.max_results = max_results
+        self.with_details = with_details
+        self.scraper_kwargs = scraper_kwargs
+        self.metrics = scraper_kwargs.setdefault("metrics", Metrics())
+        self.total = 0
+        self.completed = 0
+        self.failed: List[str] = []
+        self.not_run: List[str] = []
+        self.records = 0
+
+    async def _work(self, worker_id: int, browser, names: asyncio.Queue, results: asyncio.Queue) -> None:
+        scraper = LHKPNScraper(**self.scraper_kwargs)
+        try:
+            async with LHKPNSession(scraper, browser=browser) as session:
+                while True:
+                    try:
+                        name = names.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    if self.limiter:
+                        await self.limiter.acquire()
+                    started = time.monotonic()
+                    try:
+                        records = await session.query(name, max_results=self.max_results, with_details=self.with_details)
+                        await results.put({"query": name, "records": records, "error": None,
+                                           "elapsed": time.monotonic() - started})
+                    except Exception as e:
+                        await results.put({"query": name, "records": [], "error": str(e),
+                                           "elapsed": time.monotonic() - started})
+        except Exception as e:
+            logger.error(f"Batch worker {worker_id} stopped: {e}")
+        finally:
+            await results.put(None)
+
+    async def run(self, names: List[str]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run every query and yield results as they complete.
+
+        Names left in the queue because every worker's session failed are
+        added to `not_run` and to `failed`, so they can be retried.
+
+        Args:
+            names: The names to search for.
+
+        Yields:
+            Dictionaries with the `query`, its `records`, an `error` message (None
+            on success) and the `elapsed` seconds.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        for name in names:
+            queue.put_nowait(name)
+        self.total = len(names)
+        results: asyncio.Queue = asyncio.Queue()
+
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=self.scraper_kwargs.get("headless", True))
+            workers = [asyncio.create_task(self._work(i, browser, queue, results))
+                       for i in range(min(self.concurrency, len(names)))]
+            try:
+                running = len(workers)
+                while running:
+                    result = await results.get()
+                    if result is None:
+                        running -= 1
+                        continue
+                    self.completed += 1
+                    self.metrics.queries.inc(status="error" if result["error"] else "ok")
+                    if result["error"]:
+                        self.failed.append(result["query"])
+                        logger.error(f"[{self.completed}/{self.total}] '{result['query']}' failed after "
+                                     f"{result['elapsed']:.1f}s: {result['error']}")
+                    else:
+                        self.records += len(result["records"])
+                        logger.info(f"[{self.completed}/{self.total}] '{result['query']}': "
+                                    f"{len(result['records'])} records in {result['elapsed']:.1f}s")
+                    yield result
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+                await browser.close()
+                # Names still queued when every worker's session died were never run.
+                while not queue.empty():
+                    self.not_run.append(queue.get_nowait())
+                if self.not_run:
+                    self.metrics.queries.inc(len(self.not_run), status="not_run")
+                    self.failed.extend(self.not_run)
+
+        logger.info(f"Batch finished: {self.completed - len(self.failed) + len(self.not_run)} succeeded, "
+                    f"{len(self.failed) - len(self.not_run)} failed, {len(self.not_run)} not run, "
+                    f"{self.records} records.")
@@ -0,0 +1,97 @@
+import logging
+from collections import Counter
+from typing import Dict, Any, Iterable, Optional
+from urllib.parse import urlsplit
+
+from playwright.async_api import BrowserContext, Request, Route
+
+logger = logging.getLogger("LHKPNScraper")
+
+DEFAULT_BLOCKED_TYPES = frozenset({"image", "media", "font", "stylesheet", "manifest", "texttrack", "eventsource", "websocket"})
+DEFAULT_ALLOWED_HOSTS = ("elhkpn.kpk.go.id",)
+
+
+class ResourceBlocker:
+    """
+    Route-based request filter for a browser context.
+
+    Requests of non-essential resource types and requests to hosts outside the
+    allowlist are aborted before they hit the network. Documents, scripts and
+    XHRs from allowed hosts go through untouched.
+    """
+
+    def __init__(self, allowed_hosts: Optional[Iterable[str]] = None,
+                 blocked_types: Iterable[str] = DEFAULT_BLOCKED_TYPES,
+                 allowed_url_patterns: Iterable[str] = ()):
+        """
+        Initialize the blocker.
+
+        Args:
+            allowed_hosts: Hosts (and their subdomains) that may be contacted.
+                Defaults to the LHKPN portal host.
+            blocked_types: Playwright resource types that are always dropped.
+            allowed_url_patterns: URL substrings that are let through regardless
+                of host or resource type, e.g. a CDN script the page needs.
+        """
+        self.allowed_hosts = tuple(h.lower() for h in (allowed_hosts or DEFAULT_ALLOWED_HOSTS))
+        self.blocked_types = frozenset(blocked_types)
+        self.allowed_url_patterns = tuple(allowed_url_patterns)
+        self.blocked: Counter = Counter()
+        self.blocked_hosts: Counter = Counter()
+        self.allowed = 0
+        self.bytes_loaded = 0
+
+    async def install(self, context: BrowserContext) -> None:
+        """
+        Start filtering every request made in a browser context.
+        """
+        await context.route("**/*", self._route)
+        context.on("requestfinished", self._record_size)
+
+    def _host_allowed(self, host: str) -> bool:
+        return any(host == h or host.endswith("." + h) for h in self.allowed_hosts)
+
+    def is_allowed(self, url: str, resource_type: str) -> bool:
+        """
+        Decide whether a request may go to the network.
+        """
+        if any(pattern in url for pattern in self.allowed_url_patterns):
+            return True
+        if url.startswith(("data:", "blob:")):
+            return True
+        if resource_type in self.blocked_types:
+            return False
+        return self._host_allowed((urlsplit(url).hostname or "").lower())
+
+    async def _route(self, route: Route) -> None:
+        request = route.request
+        if self.is_allowed(request.url, request.resource_type):
+            self.allowed += 1
+            await route.fallback()
+            return
+        self.blocked[request.resource_type] += 1
+        self.blocked_hosts[urlsplit(request.url).hostname or ""] += 1
+        await route.abort("blockedbyclient")
+
+    async def _record_size(self, request: Request) -> None:
+        try:
+            sizes = await request.sizes()
+        except Exception:
+            return
+        self.bytes_loaded += max(0, sizes["responseHeadersSize"]) + max(0, sizes["responseBodySize"])
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Return blocking statistics for the run.
+
+        Aborted responses are never downloaded, so their size cannot be known;
+        `bytes_loaded` is the transfer that actually happened and is the figure
+        to compare against a run without blocking.
+        """
+        return {
+            "requests_allowed": self.allowed,
+            "requests_blocked": sum(self.blocked.values()),
+            "blocked_by_type": dict(self.blocked),
+            "blocked_by_host": dict(self.blocked_hosts.most_common(10)),
+            "bytes_loaded": self.bytes_loaded,
+        }
@@ -0,0 +1,133 @@
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Optional, Set, Tuple
+
+logger = logging.getLogger("LHKPNScraper")
+
+Key = Tuple[str, str, str]
+
+
+class Checkpoint:
+    """
+    Durable progress of a paginated crawl, so a crashed crawl can resume where it stopped.
+
+    Holds the query, the position after the last emitted record (zero-based
+    table page and row) and the natural keys of every emitted record. The file
+    is rewritten atomically every `every` records and at the end of each table
+    page, and whenever the crawl stops. A record counts as emitted once the
+    consumer asks for the next one, so records are delivered at least once:
+    after a hard kill, the records since the last save are emitted again.
+    """
+
+    def __init__(self, path: str, every: int = 25):
+        """
+        Initialize an empty checkpoint.
+
+        Args:
+            path: Path of the checkpoint file.
+            every: Number of emitted records between saves.
+        """
+        self.path = path
+        self.every = every
+        self.query: Optional[str] = None
+        self.page = 0
+        self.row = 0
+        self.emitted: Set[Key] = set()
+        self.finished = False
+        self._unsaved = 0
+
+    @classmethod
+    def load(cls, path: str, every: int = 25) -> "Checkpoint":
+        """
+        Load a checkpoint file, or return an empty checkpoint if there is none.
+        """
+        checkpoint = cls(path, every)
+        if not os.path.exists(path):
+            logger.info(f"No checkpoint at {path}, starting from the first page.")
+            return checkpoint
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+        checkpoint.query = state["query"]
+        checkpoint.page = state["page"]
+        checkpoint.row = state["row"]
+        checkpoint.emitted = {tuple(key) for key in state["emitted"]}
+        checkpoint.finished = state.get("finished", False)
+        logger.info(f"Loaded checkpoint for '{checkpoint.query}': page {checkpoint.page + 1}, "
+                    f"row {checkpoint.row}, {len(checkpoint.emitted)} records emitted.")
+        return checkpoint
+
+    def done(self, query: str) -> bool:
+        """
+        Return whether the checkpoint records a finished crawl of the query.
+        """
+        return self.finished and self.query == query
+
+    def start(self, query: str) -> bool:
+        """
+        Begin crawling a query, keeping the saved progress only if it belongs to the same query.
+
+        Returns:
+            True if the crawl resumes from saved progress.
+        """
+        if self.query == query and not self.finished and (self.page or self.row or self.emitted):
+            return True
+        self.query = query
+        self.page = self.row = 0
+        self.emitted = set()
+        self.finished = False
+        self.save()
+        return False
+
+    def record(self, page: int, row: int, key: Key) -> None:
+        """
+        Mark a record as emitted, saving the checkpoint every `every` records.
+
+        Args:
+            page: Zero-based table page of the record.
+            row: Index of the record's row on that page.
+            key: Natural key of the record.
+        """
+        self.page, self.row = page, row + 1
+        self.emitted.add(key)
+        self._unsaved += 1
+        if self._unsaved >= self.every:
+            self.save()
+
+    def page_done(self, page: int) -> None:
+        """
+        Move the checkpoint to the start of the next table page and save it.
+        """
+        self.page, self.row = page + 1, 0
+        self.save()
+
+    def finish(self) -> None:
+        """
+        Mark the crawl as complete, so resuming it does nothing.
+
+        Only call this once the last table page or `max_results` was reached;
+        a crawl that stopped early keeps its progress for `--resume`.
+        """
+        self.finished = True
+        self.save()
+
+    def save(self) -> None:
+        """
+        Write the checkpoint file atomically.
+        """
+        state = {
+            "query": self.query,
+            "page": self.page,
+            "row": self.row,
+            "emitted": sorted(self.emitted),
+            "finished": self.finished,
+            "updated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._unsaved = 0
@@ -0,0 +1,267 @@
+import asyncio
+import logging
+import time
+from typing import List, Dict, Any, Container, Optional, Tuple, Union
+from urllib.parse import urlencode, urlsplit, urlunsplit
+
+from bs4 import BeautifulSoup
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+from lhkpn_archive import ARCHIVE_KEY, ModalArchive
+from lhkpn_metrics import Metrics
+from lhkpn_models import natural_key
+from lhkpn_parse import ParseStage
+from lhkpn_ratelimit import AdaptiveRateLimiter, retry_after_seconds
+from lhkpn_scraper import LHKPNScraper, extract_detail_html
+from lhkpn_trace import Tracer
+
+logger = logging.getLogger("LHKPNScraper")
+
+
+def html_to_text(html: str) -> str:
+    """
+    Convert a DataTables cell HTML fragment to the text a browser would show.
+    """
+    if "<" not in html:
+        return html
+    return BeautifulSoup(html, "html.parser").get_text(" ", strip=True)
+
+
+def detail_link_attrs(row_html: str) -> Optional[Dict[str, str]]:
+    """
+    Extract the attributes of the comparison link from a result row's HTML.
+
+    Returns:
+        The link attributes, or None if the row has no comparison link.
+    """
+    soup = BeautifulSoup(row_html, "html.parser")
+    link = soup.select_one("a.perbandingan-announcement, a[data-target='#modal-perbandingan-announcement-lhkpn']")
+    if link is None:
+        return None
+    return {k: " ".join(v) if isinstance(v, list) else v for k, v in link.attrs.items()}
+
+
+class PortalHTTPClient:
+    """
+    Replays the portal's search and comparison endpoints over a pooled HTTP client.
+
+    The request templates, cookies and headers are captured from a browser session
+    in which `LHKPNScraper.search` has run, so the portal's CSRF token and session
+    cookies are reused as-is.
+    """
+
+    def __init__(self, session: Dict[str, Any], max_connections: int = 20, page_length: int = 100,
+                 parser: Optional[ParseStage] = None, archive: Optional[ModalArchive] = None,
+                 known_reports: Optional[Container[Tuple[str, str, str]]] = None, tracer: Optional[Tracer] = None,
+                 metrics: Optional[Metrics] = None, rate_limiter: Optional[AdaptiveRateLimiter] = None,
+                 retries: int = 2):
+        """
+        Initialize the client.
+
+        Args:
+            session: Captured session from `LHKPNScraper.export_http_session`.
+            max_connections: Size of the keep-alive connection pool.
+            page_length: Number of rows requested per search page.
+            parser: Parse stage for detail content. Defaults to inline parsing with bs4.
+            archive: Archive for the raw detail HTML, if it should be kept.
+            known_reports: Natural keys of reports already fetched, which are skipped.
+            tracer: Records timing spans for search pages, detail requests and parsing.
+            metrics: Counts records and detail fetches; fed the tracer's spans.
+            rate_limiter: Paces every request and adapts to the portal's response
+                times and HTTP 429/5xx responses.
+            retries: Times a request answered with HTTP 429/5xx, or failing at the
+                transport level, is retried after backing off.
+        """
+        if httpx is None:
+            raise ImportError("The HTTP client mode requires httpx: pip install httpx")
+        self.session = session
+        self.max_connections = max_connections
+        self.page_length = page_length
+        self.parser = parser or ParseStage()
+        self.archive = archive
+        self.known_reports = known_reports
+        self.tracer = tracer or Tracer()
+        self.metrics = metrics or Metrics()
+        self.tracer.add_listener(self.metrics.observe_span)
+        self.rate_limiter = rate_limiter
+        self.retries = retries
+        self.client: Optional["httpx.AsyncClient"] = None
+        self._slots = asyncio.Semaphore(max_connections)
+
+    async def __aenter__(self) -> "PortalHTTPClient":
+        self.client = httpx.AsyncClient(
+            cookies={c["name"]: c["value"] for c in self.session["cookies"]},
+            headers=self.session["headers"],
+            limits=httpx.Limits(max_connections=self.max_connections,
+                                max_keepalive_connections=self.max_connections),
+            timeout=httpx.Timeout(30.0),
+            follow_redirects=True,
+        )
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.client.aclose()
+
+    async def _send(self, template: Dict[str, Any], params: List[Tuple[str, str]], url: Optional[str] = None) -> "httpx.Response":
+        url = url or template["url"]
+        for attempt in range(self.retries + 1):
+            if self.rate_limiter:
+                await self.rate_limiter.acquire()
+            async with self._slots:
+                started = time.monotonic()
+                try:
+                    if template["method"] == "GET":
+                        parts = urlsplit(url)
+                        response = await self.client.get(urlunsplit(parts._replace(query=urlencode(params))))
+                    else:
+                        response = await self.client.request(template["method"], url, content=urlencode(params),
+                                                             headers={"content-type": "application/x-www-form-urlencoded"})
+                except httpx.TransportError as e:
+                    response, error = None, e
+            if response is None:
+                if self.rate_limiter:
+                    self.rate_limiter.observe(failed=True)
+                self.metrics.throttled.inc(status="failed")
+                if attempt == self.retries:
+                    raise error
+                retry_after = None
+            else:
+                status = response.status_code
+                retry_after = retry_after_seconds(response.headers.get("retry-after"))
+                if self.rate_limiter:
+                    self.rate_limiter.observe(time.monotonic() - started, status, retry_after=retry_after)
+                if status != 429 and status < 500:
+                    break
+                self.metrics.throttled.inc(status=str(status))
+                if attempt == self.retries:
+                    break
+            self.metrics.retries.inc(operation="http")
+            if not self.rate_limiter:
+                # Without a limiter to pace the retry, back off exponentially.
+                await asyncio.sleep(retry_after if retry_after is not None else 2 ** attempt)
+        if self.rate_limiter:
+            self.metrics.rate_limit.set(self.rate_limiter.rate)
+        response.raise_for_status()
+        return response
+
+    async def search_page(self, name: str, start: int) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Fetch one page of search results.
+
+        Args:
+            name: The name to search for.
+            start: Offset of the first row.
+
+        Returns:
+            The harvested rows of the page and the total number of matching rows.
+        """
+        template = self.session["search"]
+        params = []
+        for key, value in template["params"]:
+            if value == template["query"]:
+                value = name
+            elif key == "start":
+                value = str(start)
+            elif key == "length":
+                value = str(self.page_length)
+            elif key == "draw":
+                value = str(start // self.page_length + 1)
+            params.append((key, value))
+
+        with self.tracer.span("http_search_page", start=start):
+            payload = (await self._send(template, params)).json()
+        rows = []
+        for row in payload.get("data", []):
+            cells = list(row.values()) if isinstance(row, dict) else list(row)
+            cells = ["" if c is None else str(c) for c in cells]
+            row_html = "".join(cells)
+            rows.append({
+                "cells": [html_to_text(c) for c in cells],
+                "has_detail": any(m in row_html for m in ("perbandingan-announcement", "fa-history", "fa-file-text-o")),
+                "detail_attrs": detail_link_attrs(row_html),
+            })
+        total = int(payload.get("recordsFiltered", payload.get("recordsTotal", len(rows))))
+        return rows, total
+
+    async def fetch_detail(self, detail_attrs: Dict[str, str]) -> Optional[str]:
+        """
+        Fetch the comparison content of a row.
+
+        Args:
+            detail_attrs: Attributes of the row's comparison link.
+
+        Returns:
+            HTML for `parse_detail`, or None if the request could not be built.
+        """
+        template = self.session.get("detail")
+        if not template:
+            return None
+
+        url = template["url"]
+        for attr, original in template["url_attrs"].items():
+            url = url.replace(original, detail_attrs.get(attr, original))
+        params = [(key, detail_attrs.get(template["param_attrs"][key], value) if key in template["param_attrs"] else value)
+                  for key, value in template["params"]]
+
+        with self.tracer.span("http_detail"):
+            response = await self._send(template, params, url=url)
+        return extract_detail_html(response.text)
+
+    async def _detail_record(self, data: Dict[str, Any], detail_attrs: Dict[str, str]) -> None:
+        label = f"{data['name']} ({data['tanggal_lapor']})"
+        try:
+            modal_html = await self.fetch_detail(detail_attrs)
+            if modal_html is not None:
+                self.metrics.modals_opened.inc()
+                with self.tracer.span("parse_detail", executor=self.parser.mode, html_bytes=len(modal_html)):
+                    data.update(await self.parser.submit(modal_html))
+                if self.archive:
+                    data[ARCHIVE_KEY] = self.archive.put(modal_html)
+        except Exception as e:
+            logger.error(f"Error fetching detail for {label}: {e}")
+            self.metrics.modal_failures.inc()
+
+    async def query(self, name: str, max_results: Union[int, float] = float('inf'),
+                    with_details: bool = True) -> List[Dict[str, Any]]:
+        """
+        Search for a name and fetch the details of every result concurrently.
+
+        Args:
+            name: The name to search for.
+            max_results: Maximum number of records to return.
+            with_details: Whether to fetch each row's comparison details.
+
+        Returns:
+            A list of dictionaries containing the extracted data.
+        """
+        logger.info(f"Searching for '{name}' over HTTP...")
+        all_data = []
+        detail_jobs = []
+        skipped = 0
+        start = 0
+        while len(all_data) < max_results:
+            rows, total = await self.search_page(name, start)
+            for row in rows:
+                if len(all_data) >= max_results:
+                    break
+                data = LHKPNScraper.build_record(row["cells"])
+                if self.known_reports is not None and natural_key(data) in self.known_reports:
+                    skipped += 1
+                    continue
+                if with_details and row["has_detail"] and row["detail_attrs"]:
+                    detail_jobs.append(self._detail_record(data, row["detail_attrs"]))
+                all_data.append(data)
+            start += len(rows)
+            if not rows or start >= total:
+                break
+
+        await asyncio.gather(*detail_jobs)
+        self.metrics.record_scraped(len(all_data))
+        if skipped:
+            logger.info(f"Skipped {skipped} reports that were already fetched.")
+        logger.info(f"Fetched {len(all_data)} records for '{name}' over HTTP. Parse stage: {self.parser.stats()}")
+        return all_data
@@ -0,0 +1,298 @@
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Optional, Sequence, Tuple
+
+logger = logging.getLogger("LHKPNScraper")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """
+    A value that only goes up, such as the number of records scraped.
+    """
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {} if labelnames else {(): 0.0}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """
+        Add `amount` to the counter of the given label values.
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        """
+        Return the counter of the given label values.
+        """
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(Counter):
+    """
+    A value that goes up and down, such as a queue depth.
+    """
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        """
+        Set the gauge of the given label values.
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def remove(self, **labels: str) -> None:
+        """
+        Stop exporting every series matching the given label values, e.g. once their session has closed.
+        """
+        match = [(self.labelnames.index(name), str(value)) for name, value in labels.items()]
+        with self._lock:
+            for key in [key for key in self._values if all(key[i] == value for i, value in match)]:
+                del self._values[key]
+
+
+class Histogram(_Metric):
+    """
+    Counts observations, such as durations in seconds, into cumulative buckets.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DURATION_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """
+        Record one observation for the given label values.
+        """
+        key = self._key(labels)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * len(self.buckets))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def _samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            items = sorted((key, list(counts), self._sums[key]) for key, counts in self._counts.items())
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames + ("le",), key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Metrics:
+    """
+    The crawl's counters, gauges and histograms, rendered in the Prometheus text format.
+
+    One instance can be shared by every scraper, session and batch worker of a
+    run. Stage durations come from the `lhkpn_trace.Tracer` spans the instance
+    is attached to; queue depths and browser memory are sampled by each open
+    `LHKPNSession` every `sample_interval` seconds, labelled with its session id.
+    """
+
+    def __init__(self, sample_interval: float = 5.0):
+        """
+        Initialize the metrics.
+
+        Args:
+            sample_interval: Seconds between samples of queue depths and browser memory.
+        """
+        self.sample_interval = sample_interval
+        self.records = Counter("lhkpn_records_total", "Records scraped.")
+        self.modals_opened = Counter("lhkpn_modals_opened_total", "Detail modals opened or fetched.")
+        self.modal_failures = Counter("lhkpn_modal_failures_total", "Detail modals that could not be read.")
+        self.page_transitions = Counter("lhkpn_page_transitions_total", "Results table page changes.")
+        self.retries = Counter("lhkpn_retries_total", "Operations retried, by operation.", ["operation"])
+        self.throttled = Counter("lhkpn_throttled_responses_total",
+                                 "Portal requests answered with HTTP 429/5xx or failed, by status.", ["status"])
+        self.rate_limit = Gauge("lhkpn_portal_rate_limit", "Portal requests per second allowed by the adaptive rate limiter.")
+        self.queries = Counter("lhkpn_queries_total", "Batch queries run, by outcome.", ["status"])
+        self.last_record = Gauge("lhkpn_last_record_timestamp_seconds", "Unix time the last record was scraped.")
+        self.queue_depth = Gauge("lhkpn_queue_depth", "Current depth of a pipeline queue, per session.", ["session", "queue"])
+        self.browser_memory = Gauge("lhkpn_browser_memory_bytes",
+                                    "JavaScript heap of the session's main page, from CDP Performance.getMetrics.",
+                                    ["session", "kind"])
+        self.browser_dom_nodes = Gauge("lhkpn_browser_dom_nodes", "DOM nodes of the session's main page.", ["session"])
+        self.stage_duration = Histogram("lhkpn_stage_duration_seconds",
+                                        "Duration of traced crawl stages, e.g. parse_detail or modal_open.", ["stage"])
+        self.started = Gauge("lhkpn_start_timestamp_seconds", "Unix time the crawl started.")
+        self.started.set(time.time())
+        self._sessions = 0
+        self._session_lock = threading.Lock()
+
+    def _instruments(self) -> List[_Metric]:
+        return [value for value in vars(self).values() if isinstance(value, _Metric)]
+
+    def record_scraped(self, count: int = 1) -> None:
+        """
+        Count scraped records and note when the last one arrived.
+        """
+        if count:
+            self.records.inc(count)
+            self.last_record.set(time.time())
+
+    def observe_span(self, name: str, seconds: float, error: bool) -> None:
+        """
+        `Tracer` listener feeding stage durations into the histogram.
+        """
+        self.stage_duration.observe(seconds, stage=name)
+
+    def new_session(self) -> str:
+        """
+        Return an id for labelling a session's sampled gauges.
+        """
+        with self._session_lock:
+            session_id = str(self._sessions)
+            self._sessions += 1
+        return session_id
+
+    def forget_session(self, session_id: str) -> None:
+        """
+        Stop exporting the sampled gauges of a closed session.
+        """
+        for gauge in (self.queue_depth, self.browser_memory, self.browser_dom_nodes):
+            gauge.remove(session=session_id)
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+        """
+        lines = []
+        for metric in self._instruments():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """
+    Serves `Metrics` at `/metrics` from a background thread while the crawl runs.
+    """
+
+    def __init__(self, metrics: Metrics, port: int = 9464, host: str = "127.0.0.1"):
+        """
+        Initialize the server.
+
+        Args:
+            metrics: The metrics to serve.
+            port: Port to listen on; 0 picks a free port.
+            host: Interface to listen on. Defaults to localhost only.
+        """
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/metrics"
+
+    def start(self) -> "MetricsServer":
+        """
+        Start listening in a daemon thread.
+        """
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="lhkpn-metrics", daemon=True)
+        self._thread.start()
+        logger.info(f"Serving metrics at {self.url}")
+        return self
+
+    def stop(self) -> None:
+        """
+        Stop the server.
+        """
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "MetricsServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
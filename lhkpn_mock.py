@@ -0,0 +1,621 @@
+import argparse
+import hashlib
+import html
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Any, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+from lhkpn_models import BULAN, parse_tanggal
+
+logger = logging.getLogger("LHKPNScraper")
+
+PORTAL_PATH = "/portal/user/login"
+SEARCH_PATH = "/portal/user/check_search_announ"
+DETAIL_PATH = "/portal/user/perbandingan_announ"
+
+EXAMPLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "example.json")
+
+CATEGORY_HEADERS = [
+    ("A.", "TANAH DAN BANGUNAN", "tanah_bangunan"),
+    ("B.", "ALAT TRANSPORTASI DAN MESIN", "transportasi"),
+    ("C.", "HARTA BERGERAK LAINNYA", "bergerak_lainnya"),
+    ("D.", "SURAT BERHARGA", "surat_berharga"),
+    ("E.", "KAS DAN SETARA KAS", "kas"),
+    ("F.", "HARTA LAINNYA", "harta_lainnya"),
+    ("III.", "HUTANG", "hutang"),
+]
+
+BULAN_NAMES = {month: name.capitalize() for name, month in BULAN.items() if len(name) > 3 or name == "mei"}
+
+# Just enough of jQuery, DataTables and remodal for the scraper's selectors,
+# event waits and page API calls to behave as they do on the real portal.
+PORTAL_JS = r"""
+(function () {
+    const handlers = [];
+    const tables = new Map();
+
+    function parseEvents(events) {
+        return events.split(/\s+/).filter(Boolean).map(e => {
+            const [type, ...ns] = e.split('.');
+            return { type, ns };
+        });
+    }
+
+    function dispatch(target, type) {
+        for (const h of handlers.slice()) {
+            if (h.type !== type) continue;
+            const hit = h.selector ? (h.el.contains(target) && target.matches(h.selector)) : h.el === target;
+            if (!hit) continue;
+            if (h.once) handlers.splice(handlers.indexOf(h), 1);
+            h.fn.call(target, { type, target });
+        }
+    }
+
+    function Wrapped(els) { this.els = els; }
+    Wrapped.prototype.on = function (events, selector, fn, once) {
+        if (typeof selector === 'function') { once = fn; fn = selector; selector = null; }
+        for (const el of this.els) {
+            for (const e of parseEvents(events)) handlers.push({ el, type: e.type, ns: e.ns, selector, fn, once: !!once });
+        }
+        return this;
+    };
+    Wrapped.prototype.one = function (events, selector, fn) {
+        if (typeof selector === 'function') return this.on(events, selector, true);
+        return this.on(events, selector, fn, true);
+    };
+    Wrapped.prototype.off = function (events) {
+        for (const e of parseEvents(events || '')) {
+            for (const h of handlers.slice()) {
+                if (this.els.includes(h.el) && (!e.type || h.type === e.type) && e.ns.every(n => h.ns.includes(n))) {
+                    handlers.splice(handlers.indexOf(h), 1);
+                }
+            }
+        }
+        return this;
+    };
+    Wrapped.prototype.trigger = function (type) {
+        this.els.forEach(el => dispatch(el, type));
+        return this;
+    };
+    Wrapped.prototype.DataTable = function () { return tables.get(this.els[0]); };
+
+    function $(target) {
+        if (typeof target === 'string') return new Wrapped(Array.from(document.querySelectorAll(target)));
+        return new Wrapped([target]);
+    }
+    $.fn = {
+        dataTable: {
+            isDataTable: selector => tables.has(typeof selector === 'string' ? document.querySelector(selector) : selector)
+        }
+    };
+    window.jQuery = window.$ = $;
+
+    class DataTable {
+        constructor(el, url) {
+            this.el = el;
+            this.url = url;
+            this.start = 0;
+            this.length = 10;
+            this.total = 0;
+            this.query = '';
+            this.drawCount = 0;
+            const api = this;
+            this.page = function (index) {
+                if (index === 'next') api.start += api.length;
+                else if (index === 'previous') api.start = Math.max(0, api.start - api.length);
+                else api.start = index * Math.max(api.length, 0);
+                return api;
+            };
+            this.page.len = function (length) {
+                if (length === undefined) return api.length;
+                api.length = length;
+                api.start = 0;
+                return api;
+            };
+            tables.set(el, this);
+        }
+
+        search(query) {
+            this.query = query;
+            this.start = 0;
+            return this;
+        }
+
+        draw() {
+            const processing = document.getElementById(this.el.id + '_processing');
+            processing.style.display = 'block';
+            this.drawCount += 1;
+            const body = new URLSearchParams({
+                draw: this.drawCount, start: this.start, length: this.length, CARI_NAMA: this.query
+            });
+            fetch(this.url, { method: 'POST', body })
+                .then(r => r.json())
+                .then(payload => {
+                    this.total = payload.recordsFiltered;
+                    const tbody = this.el.querySelector('tbody');
+                    tbody.innerHTML = payload.data.length
+                        ? payload.data.map(row => '<tr>' + row.map(c => '<td>' + c + '</td>').join('') + '</tr>').join('')
+                        : '<tr class="odd"><td colspan="9" class="dataTables_empty">Data Tidak Ditemukan</td></tr>';
+                    const last = this.length < 0 || this.start + this.length >= this.total;
+                    document.getElementById(this.el.id + '_next').classList.toggle('disabled', last);
+                    document.getElementById(this.el.id + '_previous').classList.toggle('disabled', this.start === 0);
+                })
+                .finally(() => {
+                    processing.style.display = 'none';
+                    dispatch(this.el, 'draw');
+                });
+            return this;
+        }
+    }
+
+    function openModal(modal) {
+        modal.classList.add('remodal-is-opened');
+        modal.parentElement.classList.add('remodal-is-opened');
+        modal.parentElement.style.display = 'block';
+        dispatch(modal, 'opened');
+    }
+
+    function closeModal(modal) {
+        modal.classList.remove('remodal-is-opened');
+        modal.parentElement.classList.remove('remodal-is-opened');
+        modal.parentElement.style.display = 'none';
+        const content = modal.querySelector('.remodal-content');
+        if (content && modal.id === 'modal-perbandingan-announcement-lhkpn') content.innerHTML = '';
+        if (!document.querySelector('.remodal-is-opened')) {
+            const overlay = document.querySelector('.remodal-overlay');
+            if (overlay) overlay.style.display = 'none';
+            document.body.classList.remove('remodal-is-active');
+        }
+        dispatch(modal, 'closed');
+    }
+
+    function showAnnouncements() {
+        if (window.location.hash === '#announ') document.getElementById('announ').style.display = 'block';
+    }
+
+    document.addEventListener('DOMContentLoaded', () => {
+        const table = new DataTable(document.getElementById('table-pengumuman'), window.LHKPN_SEARCH_URL);
+
+        document.addEventListener('click', event => {
+            const close = event.target.closest('.remodal-close');
+            if (close) {
+                event.preventDefault();
+                closeModal(close.closest('.remodal'));
+                return;
+            }
+            const tab = event.target.closest("a.page-scroll[href='#announ']");
+            if (tab) {
+                event.preventDefault();
+                window.location.hash = '#announ';
+                showAnnouncements();
+                return;
+            }
+            const next = event.target.closest('#table-pengumuman_next, #table-pengumuman_previous');
+            if (next) {
+                event.preventDefault();
+                if (!next.classList.contains('disabled')) table.page(next.id.endsWith('_next') ? 'next' : 'previous').draw('page');
+                return;
+            }
+            const link = event.target.closest('a.perbandingan-announcement');
+            if (link) {
+                event.preventDefault();
+                const modal = document.getElementById('modal-perbandingan-announcement-lhkpn');
+                fetch(window.LHKPN_DETAIL_URL, { method: 'POST', body: new URLSearchParams({ id: link.dataset.id }) })
+                    .then(r => r.text())
+                    .then(content => {
+                        modal.querySelector('.remodal-content').innerHTML = content;
+                        openModal(modal);
+                    });
+            }
+        });
+
+        document.addEventListener('keydown', event => {
+            if (event.key !== 'Escape') return;
+            document.querySelectorAll('.remodal.remodal-is-opened').forEach(closeModal);
+        });
+
+        document.getElementById('form-announ').addEventListener('submit', event => {
+            event.preventDefault();
+            table.search(document.getElementById('CARI_NAMA').value).draw();
+        });
+
+        document.querySelector("select[name='table-pengumuman_length']").addEventListener('change', event => {
+            table.page.len(parseInt(event.target.value, 10)).draw();
+        });
+
+        window.addEventListener('hashchange', showAnnouncements);
+        showAnnouncements();
+    });
+})();
+"""
+
+PORTAL_HTML = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>e-LHKPN (mock)</title>
+<style>
+  .remodal-overlay, .remodal-wrapper {{ position: fixed; inset: 0; }}
+  .remodal-overlay {{ background: rgba(0, 0, 0, 0.5); }}
+  .remodal-wrapper {{ display: none; overflow: auto; }}
+  .remodal-wrapper.remodal-is-opened {{ display: block; }}
+  .remodal {{ background: #fff; margin: 40px auto; max-width: 900px; padding: 16px; }}
+  .paginate_button.disabled {{ color: #999; pointer-events: none; }}
+</style>
+<script>
+  window.LHKPN_SEARCH_URL = {search_url};
+  window.LHKPN_DETAIL_URL = {detail_url};
+</script>
+<script>{script}</script>
+</head>
+<body class="{body_class}">
+<nav><a class="page-scroll" href="#announ">Pengumuman</a></nav>
+{popups}
+<section id="announ" style="display: none">
+  <form id="form-announ">
+    <input id="CARI_NAMA" name="CARI_NAMA" type="text" placeholder="Nama">
+    <button type="submit" class="btn btn-success">Cari</button>
+  </form>
+  <div id="table-pengumuman_length">
+    <select name="table-pengumuman_length">
+      <option value="10">10</option><option value="25">25</option><option value="50">50</option><option value="100">100</option>
+    </select>
+  </div>
+  <div id="table-pengumuman_processing" style="display: none">Processing...</div>
+  <table id="table-pengumuman" class="table table-striped">
+    <thead><tr><th>No</th><th>Nama</th><th>Lembaga</th><th>Unit Kerja</th><th>Jabatan</th><th>Tanggal Lapor</th><th>Jenis Laporan</th><th>Total Harta</th><th>Aksi</th></tr></thead>
+    <tbody></tbody>
+  </table>
+  <div id="table-pengumuman_paginate">
+    <a id="table-pengumuman_previous" class="paginate_button previous disabled" href="#">Previous</a>
+    <a id="table-pengumuman_next" class="paginate_button next disabled" href="#">Next</a>
+  </div>
+</section>
+<div class="remodal-wrapper">
+  <div class="remodal" id="modal-perbandingan-announcement-lhkpn">
+    <button class="remodal-close" aria-label="Close">&times;</button>
+    <div class="remodal-content"></div>
+  </div>
+</div>
+</body>
+</html>
+"""
+
+POPUP_HTML = """<div class="remodal-wrapper remodal-is-opened" style="display: block">
+  <div class="remodal remodal-is-opened" id="popup-{index}">
+    <button class="remodal-close" aria-label="Close">&times;</button>
+    <p>Pengumuman {index}</p>
+  </div>
+</div>"""
+
+
+def format_tanggal(day: date) -> str:
+    """
+    Format a date the way the portal does, e.g. "31 Desember 2024".
+    """
+    return f"{day.day} {BULAN_NAMES[day.month]} {day.year}"
+
+
+def load_templates(path: str = EXAMPLE_PATH) -> List[Dict[str, Any]]:
+    """
+    Load the records synthetic reports are modelled on.
+    """
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def synthesize_records(query: str, count: int, templates: List[Dict[str, Any]],
+                       asset_rows: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Build deterministic reports for a query.
+
+    Each report copies a template's institution, position and assets and gets a
+    distinct reporting date, so every report has its own natural key.
+
+    Args:
+        query: The searched name, used as the reports' name.
+        count: Number of reports.
+        templates: Records to copy, e.g. from `example.json`.
+        asset_rows: If set, pad `tanah_bangunan` to this many lines to produce
+            pathologically large modals.
+
+    Returns:
+        The synthesized records.
+    """
+    records = []
+    for i in range(count):
+        template = templates[i % len(templates)]
+        reported = (parse_tanggal(template["tanggal_lapor"]) or date(2024, 12, 31)) - timedelta(days=7 * (i // len(templates)))
+        record = dict(template, name=query.strip().upper(), tanggal_lapor=format_tanggal(reported))
+        if asset_rows:
+            lines = template["tanah_bangunan"] or [{"description": "Tanah Seluas 100 m2 di KAB / KOTA BOGOR, HASIL SENDIRI",
+                                                     "value": "1.000.000.000"}]
+            record["tanah_bangunan"] = [lines[j % len(lines)] for j in range(asset_rows)]
+        records.append(record)
+    return records
+
+
+def render_modal(record: Dict[str, Any]) -> str:
+    """
+    Render the comparison modal content of a record, as the portal's comparison endpoint returns it.
+    """
+    rows = ['<tr><td>II.</td><td colspan="3"><b>DATA HARTA</b></td></tr>']
+    for indicator, title, key in CATEGORY_HEADERS:
+        lines = record.get(key) or []
+        listed = [line for line in lines if line["description"] != "Total"]
+        total = next((line["value"] for line in lines if line["description"] == "Total"), None)
+        rows.append(f"<tr><td></td><td>{indicator}</td><td>{title}</td><td>{html.escape(total or '')}</td></tr>")
+        for n, line in enumerate(listed, 1):
+            rows.append(f"<tr><td></td><td>{n}.</td><td>{html.escape(line['description'])}</td>"
+                        f"<td>{html.escape(line['value'])}</td></tr>")
+    return ('<h4>Perbandingan Harta Kekayaan</h4><table class="table"><thead><tr><th></th><th>No</th><th>Uraian</th>'
+            '<th>Nilai</th></tr></thead><tbody class="data_perbandingan_lhkpn">' + "".join(rows) + "</tbody></table>")
+
+
+def report_id(query: str, index: int) -> str:
+    """
+    Return the id the mock portal gives the comparison link of a search result.
+    """
+    return hashlib.sha1(f"{query.strip().upper()}|{index}".encode("utf-8")).hexdigest()[:16]
+
+
+class MockPortal:
+    """
+    A local stand-in for the e-LHKPN announcement portal.
+
+    Serves the announcement page with remodal popups, a server-side
+    `#table-pengumuman` DataTable with pagination and a length select, and the
+    comparison endpoint behind each row's `a.perbandingan-announcement`. Every
+    query returns `results` synthetic reports modelled on `example.json`.
+    Point the scraper at it with `LHKPNScraper(base_url=portal.base_url)`.
+
+    Example:
+        with MockPortal(results=50, latency=0.05) as portal:
+            scraper = LHKPNScraper(base_url=portal.base_url)
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, results: int = 25, latency: float = 0.0,
+                 detail_latency: Optional[float] = None, popups: int = 2, asset_rows: Optional[int] = None,
+                 templates: Optional[List[Dict[str, Any]]] = None, throttle: Optional[float] = None):
+        """
+        Initialize the portal.
+
+        Args:
+            host: Interface to listen on.
+            port: Port to listen on; 0 picks a free port.
+            results: Number of reports every query returns.
+            latency: Seconds added to each search request.
+            detail_latency: Seconds added to each comparison request. Defaults to `latency`.
+            popups: Number of remodal popups open when the page loads.
+            asset_rows: Pad each report to this many land and building lines.
+            templates: Records to model reports on. Defaults to `example.json`.
+            throttle: Search and comparison requests per second above which the
+                portal answers HTTP 429 with `Retry-After: 1`, like a rate-limited
+                server. None serves every request.
+        """
+        self.host = host
+        self.port = port
+        self.results = results
+        self.latency = latency
+        self.detail_latency = latency if detail_latency is None else detail_latency
+        self.popups = popups
+        self.asset_rows = asset_rows
+        self.templates = templates or load_templates()
+        self.throttle = throttle
+        self.requests = {"portal": 0, "search": 0, "detail": 0, "throttled": 0}
+        self._recent: deque = deque()
+        self.server: Optional[_Server] = None
+        self._thread: Optional[threading.Thread] = None
+        self._records: Dict[str, List[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        """
+        The URL to pass as the scraper's `base_url`.
+        """
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "MockPortal":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """
+        Start serving in a background thread.
+        """
+        self.server = _Server((self.host, self.port), _Handler)
+        self.server.portal = self
+        self._thread = threading.Thread(target=self.server.serve_forever, name="lhkpn-mock", daemon=True)
+        self._thread.start()
+        logger.info(f"Mock portal serving {self.results} results per query at {self.base_url}")
+
+    def stop(self) -> None:
+        """
+        Stop the server.
+        """
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self._thread.join()
+            self.server = None
+
+    def count(self, kind: str) -> None:
+        """
+        Count a served request of a kind: "portal", "search" or "detail".
+        """
+        with self._lock:
+            self.requests[kind] += 1
+
+    def throttled(self) -> bool:
+        """
+        Decide whether to refuse a request because more than `throttle` arrived in the last second.
+        """
+        if self.throttle is None:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            while self._recent and now - self._recent[0] > 1.0:
+                self._recent.popleft()
+            if len(self._recent) >= self.throttle:
+                self.requests["throttled"] += 1
+                return True
+            self._recent.append(now)
+            return False
+
+    def records(self, query: str) -> List[Dict[str, Any]]:
+        """
+        Return the reports a query finds.
+        """
+        key = query.strip().upper()
+        with self._lock:
+            if key not in self._records:
+                self._records[key] = synthesize_records(key, self.results, self.templates, self.asset_rows) if key else []
+            return self._records[key]
+
+    def page_html(self) -> str:
+        """
+        Render the announcement page.
+        """
+        return PORTAL_HTML.format(
+            search_url=json.dumps(SEARCH_PATH),
+            detail_url=json.dumps(DETAIL_PATH),
+            script=PORTAL_JS,
+            body_class="remodal-is-active" if self.popups else "",
+            popups=("".join(POPUP_HTML.format(index=i + 1) for i in range(self.popups))
+                    + ('<div class="remodal-overlay"></div>' if self.popups else "")),
+        )
+
+    def search(self, params: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Answer a DataTables server-side request.
+        """
+        query = params.get("CARI_NAMA", "")
+        records = self.records(query)
+        start = int(params.get("start", 0))
+        length = int(params.get("length", 10))
+        shown = records[start:] if length < 0 else records[start:start + length]
+        data = []
+        for offset, record in enumerate(shown):
+            index = start + offset
+            link = (f'<a href="#" class="perbandingan-announcement" data-id="{report_id(query, index)}" '
+                    f'data-toggle="modal" data-target="#modal-perbandingan-announcement-lhkpn">'
+                    f'<i class="fa fa-history"></i> Perbandingan</a>')
+            data.append([str(index + 1)] + [html.escape(record[key]) for key in (
+                "name", "lembaga", "unit_kerja", "jabatan", "tanggal_lapor", "jenis_laporan", "total_harta")] + [link])
+        return {"draw": int(params.get("draw", 1)), "recordsTotal": len(records), "recordsFiltered": len(records),
+                "data": data}
+
+    def detail(self, params: Dict[str, str]) -> Optional[str]:
+        """
+        Answer a comparison request, or return None for an unknown report id.
+        """
+        wanted = params.get("id", "")
+        with self._lock:
+            searched = list(self._records.items())
+        for query, records in searched:
+            for index, record in enumerate(records):
+                if report_id(query, index) == wanted:
+                    return render_modal(record)
+        return None
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Concurrent detail workers and the HTTP client open many connections at once.
+    request_queue_size = 128
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: _Server
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug(f"Mock portal: {format % args}")
+
+    def _params(self) -> Dict[str, str]:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode("utf-8") if length else ""
+        return dict(parse_qsl(body or urlsplit(self.path).query, keep_blank_values=True))
+
+    def _send(self, status: int, body: str, content_type: str) -> None:
+        raw = body.encode("utf-8")
+        self.send_response(status)
+        if status == 429:
+            self.send_header("Retry-After", "1")
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(raw)))
+        if urlsplit(self.path).path in (PORTAL_PATH, "/"):
+            self.send_header("Set-Cookie", "ci_session=mock; Path=/")
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _route(self) -> None:
+        portal: MockPortal = self.server.portal
+        path = urlsplit(self.path).path
+        if path in (PORTAL_PATH, "/"):
+            portal.count("portal")
+            self._send(200, portal.page_html(), "text/html")
+        elif path in (SEARCH_PATH, DETAIL_PATH) and portal.throttled():
+            self._params()
+            self._send(429, "Too Many Requests", "text/plain")
+        elif path == SEARCH_PATH:
+            portal.count("search")
+            params = self._params()
+            time.sleep(portal.latency)
+            self._send(200, json.dumps(portal.search(params)), "application/json")
+        elif path == DETAIL_PATH:
+            portal.count("detail")
+            params = self._params()
+            time.sleep(portal.detail_latency)
+            content = portal.detail(params)
+            if content is None:
+                self._send(404, "Laporan tidak ditemukan", "text/plain")
+            else:
+                self._send(200, content, "text/html")
+        else:
+            self._send(404, "Not found", "text/plain")
+
+    def do_GET(self) -> None:
+        self._route()
+
+    def do_POST(self) -> None:
+        self._route()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve a local mock of the e-LHKPN announcement portal.")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on (default: 127.0.0.1).")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on (default: 8000).")
+    parser.add_argument("--results", type=int, default=25, help="Reports returned for every query (default: 25).")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to each search request (default: 0).")
+    parser.add_argument("--detail-latency", type=float, default=None, help="Seconds added to each comparison request (default: --latency).")
+    parser.add_argument("--popups", type=int, default=2, help="Popups open when the page loads (default: 2).")
+    parser.add_argument("--asset-rows", type=int, default=None, help="Pad every report to this many land and building lines.")
+    parser.add_argument("--throttle", type=float, default=None, help="Answer HTTP 429 above this many search and comparison requests per second.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    portal = MockPortal(args.host, args.port, args.results, args.latency, args.detail_latency, args.popups, args.asset_rows,
+                        throttle=args.throttle)
+    portal.start()
+    logger.info(f"Scrape it with: python main.py NAME --base-url {portal.base_url}")
+    try:
+        portal._thread.join()
+    except KeyboardInterrupt:
+        portal.stop()
+
+
+if __name__ == "__main__":
+    main()
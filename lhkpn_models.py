@@ -0,0 +1,175 @@
+import re
+from dataclasses import dataclass, field, fields
+from datetime import date
+from typing import List, Dict, Any, Optional, Tuple, Union
+
+from lhkpn_parse import CATEGORY_MAP
+
+BULAN = {
+    "januari": 1, "februari": 2, "maret": 3, "april": 4, "mei": 5, "juni": 6,
+    "juli": 7, "agustus": 8, "september": 9, "oktober": 10, "november": 11, "desember": 12,
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "jun": 6, "jul": 7,
+    "agu": 8, "agt": 8, "ags": 8, "sep": 9, "okt": 10, "nov": 11, "des": 12,
+}
+
+NEGATIVE_PATTERN = re.compile(r"\s*(?:\(|-|Rp\.?\s*-)", re.IGNORECASE)
+TANGGAL_PATTERN = re.compile(r"(\d{1,2})\s+([A-Za-z]+)\.?\s+(\d{4})")
+
+ASSET_FIELDS = tuple(CATEGORY_MAP.values())
+
+
+def parse_rupiah(text: Union[str, int, None]) -> Optional[int]:
+    """
+    Parse a Rupiah amount such as "Rp.2.062.241.012.691" or "34.448.143.000" into an integer.
+
+    Dots are thousands separators and a comma starts the (dropped) cents. A
+    leading minus sign or surrounding parentheses make the amount negative.
+
+    Returns:
+        The amount in whole Rupiah, or None if the text holds no digits.
+    """
+    if text is None or isinstance(text, int):
+        return text
+    negative = NEGATIVE_PATTERN.match(text) is not None
+    digits = re.sub(r"\D", "", text.split(",", 1)[0])
+    if not digits:
+        return None
+    return -int(digits) if negative else int(digits)
+
+
+def parse_tanggal(text: Union[str, date, None]) -> Optional[date]:
+    """
+    Parse an Indonesian date such as "31 Desember 2024" or "1 Agt 2023", or an ISO date.
+
+    Returns:
+        The date, or None if the text is not a recognizable date.
+    """
+    if text is None or isinstance(text, date):
+        return text
+    try:
+        return date.fromisoformat(text.strip())
+    except ValueError:
+        pass
+    match = TANGGAL_PATTERN.search(text)
+    if not match:
+        return None
+    day, month, year = match.groups()
+    month = BULAN.get(month.lower())
+    if month is None:
+        return None
+    try:
+        return date(int(year), month, int(day))
+    except ValueError:
+        return None
+
+
+@dataclass(slots=True)
+class AssetLine:
+    """
+    One line of a report's asset breakdown.
+    """
+    description: str
+    value: Optional[int]
+
+    @classmethod
+    def from_dict(cls, line: Dict[str, Any]) -> "AssetLine":
+        return cls(line.get("description", ""), parse_rupiah(line.get("value")))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"description": self.description, "value": self.value}
+
+
+@dataclass(slots=True)
+class Report:
+    """
+    A wealth report with numeric amounts and a real reporting date.
+
+    Keys of the source record that are not fields, such as `modal_sha256` or a
+    batch `query`, are kept in `extra`.
+    """
+    name: str
+    lembaga: str
+    unit_kerja: str
+    jabatan: str
+    tanggal_lapor: Optional[date]
+    jenis_laporan: str
+    total_harta: Optional[int]
+    tanah_bangunan: List[AssetLine] = field(default_factory=list)
+    transportasi: List[AssetLine] = field(default_factory=list)
+    bergerak_lainnya: List[AssetLine] = field(default_factory=list)
+    surat_berharga: List[AssetLine] = field(default_factory=list)
+    kas: List[AssetLine] = field(default_factory=list)
+    harta_lainnya: List[AssetLine] = field(default_factory=list)
+    hutang: List[AssetLine] = field(default_factory=list)
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, record: Dict[str, Any]) -> "Report":
+        """
+        Build a report from a scraped record, parsing its amounts and date.
+
+        Args:
+            record: A record as produced by `LHKPNScraper.build_record` and `parse_detail`.
+
+        Returns:
+            The typed report.
+        """
+        known = {f.name for f in fields(cls)}
+        return cls(
+            name=record.get("name", ""),
+            lembaga=record.get("lembaga", ""),
+            unit_kerja=record.get("unit_kerja", ""),
+            jabatan=record.get("jabatan", ""),
+            tanggal_lapor=parse_tanggal(record.get("tanggal_lapor")),
+            jenis_laporan=record.get("jenis_laporan", ""),
+            total_harta=parse_rupiah(record.get("total_harta")),
+            **{cat: [AssetLine.from_dict(line) for line in record.get(cat, [])] for cat in ASSET_FIELDS},
+            extra={k: v for k, v in record.items() if k not in known},
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Return the report as a JSON-serializable record, with the date in ISO format.
+        """
+        record = {
+            "name": self.name,
+            "lembaga": self.lembaga,
+            "unit_kerja": self.unit_kerja,
+            "jabatan": self.jabatan,
+            "tanggal_lapor": self.tanggal_lapor.isoformat() if self.tanggal_lapor else None,
+            "jenis_laporan": self.jenis_laporan,
+            "total_harta": self.total_harta,
+        }
+        for cat in ASSET_FIELDS:
+            record[cat] = [line.to_dict() for line in getattr(self, cat)]
+        record.update(self.extra)
+        return record
+
+    def assets(self) -> Dict[str, List[AssetLine]]:
+        """
+        Return the asset lines of the report by category.
+        """
+        return {cat: getattr(self, cat) for cat in ASSET_FIELDS}
+
+
+def natural_key(record: Union[Report, Dict[str, Any]]) -> Tuple[str, str, str]:
+    """
+    Return the key that identifies a report across crawls: name, reporting date and report type.
+
+    The date is normalized to ISO format when it can be parsed, so a typed
+    `Report` and its string record share a key.
+    """
+    if isinstance(record, Report):
+        name, tanggal, jenis = record.name, record.tanggal_lapor, record.jenis_laporan
+    else:
+        name, tanggal, jenis = record.get("name", ""), record.get("tanggal_lapor", ""), record.get("jenis_laporan", "")
+    parsed = parse_tanggal(tanggal)
+    tanggal = parsed.isoformat() if parsed else (tanggal or "")
+    return (name or "").strip().upper(), tanggal.strip(), " ".join((jenis or "").split())
+
+
+def to_record(record: Union[Report, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Return a record as a plain dictionary, whether it is a `Report` or already a dict.
+    """
+    return record.to_dict() if isinstance(record, Report) else record
@@ -0,0 +1,205 @@
+import json
+import os
+from typing import List, Dict, Any, IO, Optional, Union
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+from lhkpn_archive import ARCHIVE_KEY
+from lhkpn_models import ASSET_FIELDS, Report, parse_rupiah, parse_tanggal, to_record
+
+if pa is not None:
+    _dict_string = pa.dictionary(pa.int32(), pa.string())
+    REPORT_SCHEMA = pa.schema([
+        ("report_id", pa.int64()),
+        ("name", pa.string()),
+        ("lembaga", _dict_string),
+        ("unit_kerja", _dict_string),
+        ("jabatan", _dict_string),
+        ("tanggal_lapor", pa.date32()),
+        ("jenis_laporan", _dict_string),
+        ("total_harta", pa.int64()),
+        ("query", _dict_string),
+        ("modal_sha256", pa.string()),
+    ])
+    ASSET_SCHEMA = pa.schema([
+        ("report_id", pa.int64()),
+        ("category", _dict_string),
+        ("line", pa.int32()),
+        ("description", pa.string()),
+        ("value", pa.int64()),
+    ])
+
+
+def assets_path(path: str) -> str:
+    """
+    Return the path of the assets table written alongside a reports table.
+    """
+    root, ext = os.path.splitext(path)
+    return f"{root}.assets{ext}"
+
+
+class JSONLWriter:
+    """
+    Writes records as JSON Lines, flushing after every record.
+
+    A crash loses at most the record being written, memory use does not grow
+    with the number of records, and the file can be tailed while a crawl runs.
+    """
+
+    def __init__(self, path: str, append: bool = False):
+        """
+        Initialize the writer.
+
+        Args:
+            path: Output file path.
+            append: Whether to append to an existing file instead of truncating it.
+        """
+        self.path = path
+        self.append = append
+        self.count = 0
+        self._file: Optional[IO[str]] = None
+
+    def __enter__(self) -> "JSONLWriter":
+        self.open()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def open(self) -> None:
+        """
+        Open the output file.
+        """
+        self._file = open(self.path, "a" if self.append else "w", encoding="utf-8")
+
+    def write(self, record: Union[Dict[str, Any], Report]) -> None:
+        """
+        Write one record and flush it to disk.
+        """
+        self._file.write(json.dumps(to_record(record)) + "\n")
+        self._file.flush()
+        self.count += 1
+
+    def close(self) -> None:
+        """
+        Close the output file.
+        """
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+class ColumnarWriter:
+    """
+    Writes records as two columnar tables, in Parquet or Arrow IPC format.
+
+    The reports table holds one row per report. The assets table holds one row
+    per asset line, in long format, keyed by the report's `report_id`. Amounts
+    are int64 Rupiah, `tanggal_lapor` is a date, and repetitive text columns
+    such as `lembaga` and `jabatan` are dictionary-encoded. Records are buffered
+    and written in batches, so memory use stays bounded on large crawls.
+    """
+
+    def __init__(self, path: str, fmt: str = "parquet", batch_size: int = 10000):
+        """
+        Initialize the writer.
+
+        Args:
+            path: Output path of the reports table. The assets table is written
+                next to it, with `.assets` inserted before the extension.
+            fmt: "parquet", or "arrow" for the Arrow IPC stream format.
+            batch_size: Number of reports buffered before a batch is written.
+        """
+        if pa is None:
+            raise ImportError("Columnar export requires pyarrow: pip install pyarrow")
+        if fmt not in ("parquet", "arrow"):
+            raise ValueError(f"Unknown columnar format: {fmt}")
+        self.path = path
+        self.assets_path = assets_path(path)
+        self.fmt = fmt
+        self.batch_size = batch_size
+        self.count = 0
+        self.asset_count = 0
+        self._reports: List[Dict[str, Any]] = []
+        self._assets: List[Dict[str, Any]] = []
+        self._writers: Dict[str, Any] = {}
+
+    def __enter__(self) -> "ColumnarWriter":
+        self.open()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _open_table(self, path: str, schema: "pa.Schema"):
+        if self.fmt == "parquet":
+            return pq.ParquetWriter(path, schema, compression="zstd")
+        # The stream format, unlike the IPC file format, allows each batch its own dictionaries.
+        return pa.ipc.new_stream(path, schema)
+
+    def open(self) -> None:
+        """
+        Open both output files.
+        """
+        self._writers = {
+            "reports": self._open_table(self.path, REPORT_SCHEMA),
+            "assets": self._open_table(self.assets_path, ASSET_SCHEMA),
+        }
+
+    def write(self, record: Union[Dict[str, Any], Report]) -> None:
+        """
+        Buffer one record, writing a batch once `batch_size` reports are buffered.
+        """
+        record = to_record(record)
+        report_id = self.count
+        self._reports.append({
+            "report_id": report_id,
+            "name": record.get("name"),
+            "lembaga": record.get("lembaga"),
+            "unit_kerja": record.get("unit_kerja"),
+            "jabatan": record.get("jabatan"),
+            "tanggal_lapor": parse_tanggal(record.get("tanggal_lapor")),
+            "jenis_laporan": record.get("jenis_laporan"),
+            "total_harta": parse_rupiah(record.get("total_harta")),
+            "query": record.get("query"),
+            "modal_sha256": record.get(ARCHIVE_KEY),
+        })
+        for category in ASSET_FIELDS:
+            for line_no, line in enumerate(record.get(category) or []):
+                self._assets.append({
+                    "report_id": report_id,
+                    "category": category,
+                    "line": line_no,
+                    "description": line.get("description"),
+                    "value": parse_rupiah(line.get("value")),
+                })
+        self.count += 1
+        if len(self._reports) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Write the buffered reports and asset lines.
+        """
+        reports, assets = self._reports, self._assets
+        self._reports, self._assets = [], []
+        if reports:
+            self._writers["reports"].write_table(pa.Table.from_pylist(reports, schema=REPORT_SCHEMA))
+        if assets:
+            self._writers["assets"].write_table(pa.Table.from_pylist(assets, schema=ASSET_SCHEMA))
+        self.asset_count += len(assets)
+
+    def close(self) -> None:
+        """
+        Write any buffered records and close both output files.
+        """
+        if not self._writers:
+            return
+        self.flush()
+        for writer in self._writers.values():
+            writer.close()
+        self._writers = {}
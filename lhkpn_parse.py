@@ -0,0 +1,282 @@
+import asyncio
+import logging
+import re
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, List, Dict, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:
+    lxml = None
+
+logger = logging.getLogger("LHKPNScraper")
+
+CATEGORY_MAP = {
+    "TANAH DAN BANGUNAN": "tanah_bangunan",
+    "ALAT TRANSPORTASI DAN MESIN": "transportasi",
+    "HARTA BERGERAK LAINNYA": "bergerak_lainnya",
+    "SURAT BERHARGA": "surat_berharga",
+    "KAS DAN SETARA KAS": "kas",
+    "HARTA LAINNYA": "harta_lainnya",
+    "HUTANG": "hutang"
+}
+
+HEADER_INDICATORS = ["A.", "B.", "C.", "D.", "E.", "F.", "II.", "III."]
+
+CATEGORY_PATTERN = re.compile("|".join(re.escape(cat_name) for cat_name in CATEGORY_MAP))
+CATEGORY_ORDER = {cat_name: i for i, cat_name in enumerate(CATEGORY_MAP)}
+
+# A row as seen by the classifier: the stripped text of each td/th, and the
+# whole row's text joined with spaces.
+Row = Tuple[List[str], str]
+
+
+def empty_details() -> Dict[str, List[Dict[str, str]]]:
+    """
+    Return the asset categories of a record, all empty.
+    """
+    return {key: [] for key in CATEGORY_MAP.values()}
+
+
+def _bs4_rows(html: str) -> Optional[List[Row]]:
+    soup = BeautifulSoup(html, 'html.parser')
+    tbody = soup.find("tbody", class_="data_perbandingan_lhkpn")
+    if not tbody:
+        return None
+    return [([cell.get_text(strip=True) for cell in row.find_all(["td", "th"])], row.get_text(" ", strip=True))
+            for row in tbody.find_all("tr")]
+
+
+# Elements whose text BeautifulSoup's get_text() leaves out.
+_LXML_SKIPPED_TAGS = {"script", "style", "template"}
+
+
+def _lxml_strings(element, strings: List[str]) -> None:
+    if element.text:
+        text = element.text.strip()
+        if text:
+            strings.append(text)
+    for child in element:
+        if isinstance(child.tag, str) and child.tag not in _LXML_SKIPPED_TAGS:
+            _lxml_strings(child, strings)
+        if child.tail:
+            text = child.tail.strip()
+            if text:
+                strings.append(text)
+
+
+def _lxml_text(element, separator: str = "") -> str:
+    strings = []
+    _lxml_strings(element, strings)
+    return separator.join(strings)
+
+
+def _lxml_rows(html: str) -> Optional[List[Row]]:
+    if lxml is None:
+        raise ImportError("The lxml parser backend requires lxml: pip install lxml")
+    if not html.strip():
+        return None
+    try:
+        document = lxml.html.document_fromstring(html)
+    except etree.ParserError:
+        return None
+    tbodies = document.xpath("//tbody[contains(concat(' ', normalize-space(@class), ' '), ' data_perbandingan_lhkpn ')]")
+    if not tbodies:
+        return None
+    return [([_lxml_text(cell) for cell in row.iter("td", "th")], _lxml_text(row, " "))
+            for row in tbodies[0].iter("tr")]
+
+
+PARSER_BACKENDS: Dict[str, Callable[[str], Optional[List[Row]]]] = {
+    "bs4": _bs4_rows,
+    "lxml": _lxml_rows,
+}
+
+
+def check_backend(backend: str) -> None:
+    """
+    Raise if a parser backend is unknown or its library is not installed, before any modal is parsed.
+
+    Raises:
+        ValueError: If the backend is unknown.
+        ImportError: If the backend is "lxml" and lxml is not installed.
+    """
+    if backend not in PARSER_BACKENDS:
+        raise ValueError(f"Unknown parser backend: {backend}")
+    if backend == "lxml" and lxml is None:
+        raise ImportError("The lxml parser backend requires lxml: pip install lxml")
+
+
+def _first_total(cells: List[str]) -> Optional[str]:
+    for cell_text in cells:
+        if cell_text and any(c.isdigit() for c in cell_text) and cell_text.replace(".", "").replace(",", "").isdigit():
+            return cell_text
+    return None
+
+
+def classify_rows(rows: List[Row]) -> Dict[str, List[Dict[str, str]]]:
+    """
+    Sort the rows of the comparison table into asset categories in a single pass.
+
+    Each row's text is upper-cased once and scanned once with `CATEGORY_PATTERN`.
+    A row opens a category when a name appears in its third cell or in the first
+    50 characters of its text and it carries a header indicator; the first name in
+    `CATEGORY_MAP` order wins. Totals for categories without listed items are
+    collected in the same pass and used only when the category stays empty.
+
+    Args:
+        rows: Cell texts and row text of every row of `tbody.data_perbandingan_lhkpn`.
+
+    Returns:
+        Dictionary of categorized asset details.
+    """
+    data = empty_details()
+    totals = empty_details()
+    current_cat = None
+
+    for cells, row_text in rows:
+        matches = list(CATEGORY_PATTERN.finditer(row_text.upper()))
+
+        if matches:
+            total = _first_total(cells)
+            if total is not None:
+                for cat_name in {m.group() for m in matches}:
+                    totals[CATEGORY_MAP[cat_name]].append({"description": "Total", "value": total})
+
+        if len(cells) >= 3:
+            header_names = {m.group() for m in matches if m.end() <= 50}
+            header_names.update(CATEGORY_PATTERN.findall(cells[2].upper()))
+            if header_names:
+                c0_text = cells[0].upper()
+                c1_text = cells[1].upper()
+                if any(ind in c1_text or ind in c0_text for ind in HEADER_INDICATORS):
+                    current_cat = CATEGORY_MAP[min(header_names, key=CATEGORY_ORDER.__getitem__)]
+                    continue
+
+        if current_cat:
+            for j in range(min(len(cells), 4)):
+                cell_text = cells[j]
+                if cell_text and cell_text[0].isdigit() and cell_text.endswith("."):
+                    if j + 1 < len(cells):
+                        desc = cells[j+1]
+                        val = next((k_text for k_text in cells[j+2:] if k_text and k_text[0].isdigit()), "")
+                        if desc and val:
+                            data[current_cat].append({
+                                "description": desc,
+                                "value": val
+                            })
+                    break
+
+    # Fallback for totals if no detailed list items were found
+    for key in data:
+        if not data[key]:
+            data[key] = totals[key]
+
+    return data
+
+
+def parse_detail(html: str, backend: str = "bs4") -> Dict[str, List[Dict[str, str]]]:
+    """
+    Parse the detail modal HTML.
+
+    Every backend reads `tbody.data_perbandingan_lhkpn` in one pass into cell
+    and row texts, so they all produce the same output.
+
+    Args:
+        html: HTML content of the modal.
+        backend: "bs4" (BeautifulSoup with html.parser) or "lxml" (compiled libxml2 parser).
+
+    Returns:
+        Dictionary of categorized asset details.
+    """
+    try:
+        extract_rows = PARSER_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown parser backend: {backend}") from None
+    rows = extract_rows(html)
+    if rows is None:
+        return empty_details()
+    return classify_rows(rows)
+
+
+class ParseStage:
+    """
+    Runs `parse_detail` off the event loop so parsing overlaps with fetching.
+
+    In "inline" mode parsing happens on the event loop as before. "thread" and
+    "process" hand each modal to a pool; "process" sidesteps the GIL for the
+    CPU-bound BeautifulSoup backend. `depth` counts modals queued or being
+    parsed: a depth that keeps growing means parsing, not fetching, is the
+    bottleneck.
+    """
+
+    def __init__(self, mode: str = "inline", workers: Optional[int] = None, backend: str = "bs4"):
+        """
+        Initialize the parse stage.
+
+        Args:
+            mode: "inline", "thread" or "process".
+            workers: Pool size. Defaults to the executor's own default.
+            backend: Parser backend, "bs4" or "lxml".
+        """
+        if mode not in ("inline", "thread", "process"):
+            raise ValueError(f"Unknown parse mode: {mode}")
+        self.mode = mode
+        self.workers = workers
+        self.backend = backend
+        self.depth = 0
+        self.max_depth = 0
+        self.parsed = 0
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.mode == "process":
+                self._executor = ProcessPoolExecutor(self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="lhkpn-parse")
+        return self._executor
+
+    def _done(self, _future) -> None:
+        self.depth -= 1
+        self.parsed += 1
+
+    def submit(self, html: str) -> asyncio.Future:
+        """
+        Queue a modal for parsing.
+
+        Args:
+            html: HTML content of the modal.
+
+        Returns:
+            A future resolving to the categorized asset details.
+        """
+        loop = asyncio.get_running_loop()
+        if self.mode == "inline":
+            future = loop.create_future()
+            future.set_result(parse_detail(html, self.backend))
+            self.parsed += 1
+            return future
+
+        future = loop.run_in_executor(self._get_executor(), parse_detail, html, self.backend)
+        self.depth += 1
+        self.max_depth = max(self.max_depth, self.depth)
+        future.add_done_callback(self._done)
+        return future
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return the current and peak parse queue depth and the number of parsed modals.
+        """
+        return {"parse_queue_depth": self.depth, "max_parse_queue_depth": self.max_depth, "parsed": self.parsed}
+
+    def shutdown(self) -> None:
+        """
+        Shut down the worker pool, if one was started.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
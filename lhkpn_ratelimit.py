@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger("LHKPNScraper")
+
+
+class RateLimiter:
+    """
+    A token bucket shared by every task that talks to the portal.
+
+    Tokens refill at `rate` per second up to `burst`; each `acquire` takes one
+    token, waiting until one is available.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Initialize the limiter.
+
+        Args:
+            rate: Tokens added per second.
+            burst: Maximum number of tokens that can accumulate.
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """
+        Wait for and take one token.
+        """
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+
+class AdaptiveRateLimiter(RateLimiter):
+    """
+    A token bucket whose rate follows the portal's health (AIMD).
+
+    Every portal response is reported through `observe`. HTTP 429 and 5xx
+    responses and failed requests cut the rate by `decrease`, and a smoothed
+    time to first byte above `target_latency` cuts it by `latency_decrease`.
+    Otherwise healthy responses raise the rate by `increase`, up to `max_rate`.
+    Decreases apply at most once per `cooldown` seconds, so a burst of
+    concurrent failures counts as one signal; increases wait `cooldown` seconds
+    after any change, so healthy responses between failures cannot outweigh
+    them. A `Retry-After` pauses every caller for that long.
+    """
+
+    def __init__(self, rate: float = 2.0, burst: int = 1, min_rate: float = 0.1, max_rate: float = 10.0,
+                 target_latency: float = 1.5, increase: float = 0.1, decrease: float = 0.5,
+                 latency_decrease: float = 0.8, cooldown: float = 1.0, smoothing: float = 0.2):
+        """
+        Initialize the limiter.
+
+        Args:
+            rate: Requests per second to start at.
+            burst: Maximum number of tokens that can accumulate.
+            min_rate: Lowest rate backing off can reach.
+            max_rate: Highest rate speeding up can reach.
+            target_latency: Smoothed seconds to first byte above which the portal counts as slow.
+            increase: Requests per second added after healthy responses, at most once per `cooldown`.
+            decrease: Factor applied to the rate after a 429, 5xx or failed request.
+            latency_decrease: Factor applied to the rate while the portal is slow.
+            cooldown: Minimum seconds between two decreases, and before an increase.
+            smoothing: Weight of the newest latency in the moving average.
+        """
+        super().__init__(rate, burst)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.target_latency = target_latency
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_decrease = latency_decrease
+        self.cooldown = cooldown
+        self.smoothing = smoothing
+        self.latency: Optional[float] = None
+        self.observed = 0
+        self.throttled = 0
+        self._last_decrease = float("-inf")
+        self._last_increase = float("-inf")
+        self._paused_until = 0.0
+
+    async def acquire(self) -> None:
+        """
+        Wait out any `Retry-After` pause, then wait for and take one token.
+        """
+        delay = self._paused_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await super().acquire()
+
+    def observe(self, latency: Optional[float] = None, status: Optional[int] = None, failed: bool = False,
+                retry_after: Optional[float] = None) -> None:
+        """
+        Report the outcome of a portal request and adapt the rate.
+
+        Args:
+            latency: Seconds to the first byte of the response, if known.
+            status: HTTP status of the response.
+            failed: Whether the request failed without a response.
+            retry_after: Seconds the portal asked clients to wait, from `Retry-After`.
+        """
+        now = time.monotonic()
+        self.observed += 1
+        if latency is not None:
+            self.latency = latency if self.latency is None else (
+                self.smoothing * latency + (1 - self.smoothing) * self.latency)
+
+        if failed or status == 429 or (status is not None and status >= 500):
+            self.throttled += 1
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+            self._decrease(self.decrease, now, f"HTTP {status}" if status else "failed request")
+        elif self.latency is not None and self.latency > self.target_latency:
+            self._decrease(self.latency_decrease, now, f"latency {self.latency:.2f}s")
+        elif now - max(self._last_increase, self._last_decrease) >= self.cooldown:
+            self._last_increase = now
+            self._change(self.rate + self.increase)
+
+    def _decrease(self, factor: float, now: float, reason: str) -> None:
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self._change(self.rate * factor, reason)
+
+    def _change(self, rate: float, reason: Optional[str] = None) -> None:
+        rate = min(self.max_rate, max(self.min_rate, rate))
+        if rate == self.rate:
+            return
+        self._refill()
+        if reason:
+            logger.info(f"Portal backoff ({reason}): {self.rate:.2f} -> {rate:.2f} requests/s")
+        else:
+            logger.debug(f"Portal healthy: {self.rate:.2f} -> {rate:.2f} requests/s")
+        self.rate = rate
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return the current rate, the smoothed latency and how many responses signalled overload.
+        """
+        return {
+            "rate": round(self.rate, 3),
+            "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "observed": self.observed,
+            "throttled": self.throttled,
+        }
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a `Retry-After` header given in seconds or as an HTTP date.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
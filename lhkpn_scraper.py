@@ -2,12 +2,24 @@ import asyncio
 import json
 import logging
 import os
-from typing import List, Dict, Any, Optional, Union
+import re
+from collections import deque
+from contextlib import AsyncExitStack
+from typing import List, Dict, Any, AsyncIterator, Container, Optional, Tuple, Union
+from urllib.parse import parse_qsl, urlsplit
 
 import pandas as pd
-from playwright.async_api import async_playwright, Playwright, Browser, BrowserContext, Page
+from playwright.async_api import async_playwright, Playwright, Browser, BrowserContext, Page, Locator, Request, Response, Route
 from playwright_stealth import Stealth
-from bs4 import BeautifulSoup
+from lhkpn_archive import ARCHIVE_KEY, ModalArchive
+from lhkpn_blocking import ResourceBlocker
+from lhkpn_checkpoint import Checkpoint
+from lhkpn_metrics import Metrics
+from lhkpn_models import Report, natural_key
+from lhkpn_parse import ParseStage, check_backend, parse_detail
+from lhkpn_ratelimit import AdaptiveRateLimiter, retry_after_seconds
+from lhkpn_trace import Tracer
+from lhkpn_waits import ACTIVE_MODALS_SELECTOR, WaitStrategy
 
 # Configure logging
 logging.basicConfig(
@@ -16,283 +28,953 @@ logging.basicConfig(
 )
 logger = logging.getLogger("LHKPNScraper")
 
+ROW_SELECTOR = "table.table-striped tbody tr, #table-pengumuman tbody tr"
+SEARCH_INPUT_SELECTOR = "#CARI_NAMA, input[name='CARI_NAMA']"
+
+DISMISS_POPUPS_JS = """() => {
+    const closeButtons = document.querySelectorAll('.remodal-close');
+    closeButtons.forEach(btn => btn.click());
+    
+    const wrappers = document.querySelectorAll('.remodal-wrapper.remodal-is-opened');
+    wrappers.forEach(w => w.style.display = 'none');
+    
+    const backdrop = document.querySelector('.remodal-overlay');
+    if (backdrop) backdrop.remove();
+    
+    document.body.classList.remove('remodal-is-active');
+    
+    const bootstrapModals = document.querySelectorAll('.modal.in, .modal.show');
+    bootstrapModals.forEach(m => {
+        const close = m.querySelector('button.close, .btn-close');
+        if (close) close.click();
+        else m.style.display = 'none';
+    });
+}"""
+
+SET_PAGE_LENGTH_JS = """(length) => {
+    const select = document.querySelector("#table-pengumuman_length select, select[name='table-pengumuman_length']");
+    const options = select ? Array.from(select.options).map(o => parseInt(o.value, 10)).filter(v => !isNaN(v)) : [];
+    let target = length;
+    if (target === 'max') {
+        if (!options.length) return null;
+        target = options.includes(-1) ? -1 : Math.max(...options);
+    }
+
+    const $ = window.jQuery;
+    if ($ && $.fn.dataTable && $.fn.dataTable.isDataTable('#table-pengumuman')) {
+        const table = $('#table-pengumuman').DataTable();
+        if (table.page.len() === target) return { length: target, redrawn: false };
+        table.page.len(target).draw();
+        return { length: target, redrawn: true };
+    }
+    if (select && options.includes(target)) {
+        if (select.value === String(target)) return { length: target, redrawn: false };
+        select.value = String(target);
+        select.dispatchEvent(new Event('change', { bubbles: true }));
+        return { length: target, redrawn: true };
+    }
+    return null;
+}"""
+
+DETAIL_TBODY_CLASS = "data_perbandingan_lhkpn"
+
+# Browser requests that count as portal requests for the adaptive rate limiter.
+THROTTLED_TYPES = frozenset({"document", "xhr", "fetch"})
+
+# Headers of a captured browser request that must not be replayed verbatim.
+SKIPPED_HEADERS = {"host", "content-length", "cookie", "accept-encoding", "connection"}
+
+
+def request_params(url: str, post_data: Optional[str]) -> List[Tuple[str, str]]:
+    """
+    Return the form parameters of a request: its urlencoded body, or its query string.
+    """
+    if post_data:
+        return parse_qsl(post_data, keep_blank_values=True)
+    return parse_qsl(urlsplit(url).query, keep_blank_values=True)
+
+
+def extract_detail_html(body: str) -> str:
+    """
+    Turn the body of the comparison XHR into HTML that `parse_detail` understands.
+
+    The endpoint may answer with the modal HTML itself, with a JSON envelope
+    carrying that HTML, or with only the rows of the comparison table.
+
+    Args:
+        body: Raw response body.
+
+    Returns:
+        HTML containing a `tbody.data_perbandingan_lhkpn` element.
+    """
+    html = body
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        payload = None
+
+    if payload is not None:
+        candidates = []
+        stack = [payload]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, dict):
+                stack.extend(item.values())
+            elif isinstance(item, list):
+                stack.extend(item)
+            elif isinstance(item, str) and "<" in item:
+                candidates.append(item)
+        tagged = [c for c in candidates if DETAIL_TBODY_CLASS in c]
+        html = (tagged or sorted(candidates, key=len, reverse=True) or [""])[0]
+
+    if DETAIL_TBODY_CLASS not in html:
+        html = f'<table><tbody class="{DETAIL_TBODY_CLASS}">{html}</tbody></table>'
+    return html
+
+
 class LHKPNScraper:
     """
     A scraper for the LHKPN (Laporan Harta Kekayaan Penyelenggara Negara) website of the KPK.
     """
     BASE_URL = "https://elhkpn.kpk.go.id"
     SEARCH_PAGE = f"{BASE_URL}/portal/user/login#announ"
+    DETAIL_URL_PATTERN = r"perbandingan"
 
-    def __init__(self, headless: bool = True):
+    def __init__(self, headless: bool = True, detail_workers: int = 1, detail_mode: str = "dom", http: bool = False,
+                 wait_timeout: float = 10.0, page_length: Optional[Union[int, str]] = None,
+                 block_resources: bool = False, allowed_hosts: Optional[List[str]] = None,
+                 parser_backend: str = "bs4", archive_dir: Optional[str] = None,
+                 parse_executor: str = "inline", parse_workers: Optional[int] = None, typed: bool = False,
+                 known_reports: Optional[Container[Tuple[str, str, str]]] = None,
+                 checkpoint: Optional[Checkpoint] = None, base_url: Optional[str] = None,
+                 tracer: Optional[Tracer] = None, metrics: Optional[Metrics] = None,
+                 rate_limiter: Optional[AdaptiveRateLimiter] = None):
         """
         Initialize the scraper.
 
         Args:
             headless: Whether to run the browser in headless mode.
+            detail_workers: Number of pages fetching detail modals concurrently.
+                With 1, details are fetched on the main page one row at a time.
+            detail_mode: How detail modals are read. "dom" waits for the rendered
+                modal table, "network" captures the XHR that loads the modal content.
+            http: Whether to run queries through `PortalHTTPClient` once the browser
+                has established the portal session, instead of driving the page.
+            wait_timeout: Seconds to wait for table draws and modal transitions
+                before carrying on.
+            page_length: Rows per results page to request from the table after
+                each search. "max" picks the largest option of the table's length
+                select; None keeps the portal's default.
+            block_resources: Whether to abort images, fonts, stylesheets, media and
+                third-party requests in the browser context.
+            allowed_hosts: Hosts the browser may contact when blocking is
+                enabled, in addition to the portal host.
+            parser_backend: HTML parser used for detail modals, "bs4" or "lxml".
+            archive_dir: Directory to archive raw modal HTML in. Each detailed
+                record then carries the `modal_sha256` of its archived modal.
+            parse_executor: Where detail modals are parsed. "inline" parses on the
+                event loop; "thread" and "process" parse in a pool so parsing
+                overlaps with fetching the next modal.
+            parse_workers: Size of the parse pool. Defaults to the executor's default.
+            typed: Whether to yield `Report` objects, with integer Rupiah amounts
+                and a `date` for `tanggal_lapor`, instead of dictionaries of strings.
+            known_reports: Natural keys (see `lhkpn_models.natural_key`) of reports
+                already fetched, e.g. from `lhkpn_store.load_known_reports`. Rows of
+                known reports are skipped without opening their modal and are not
+                yielded, so only new filings are scraped.
+            checkpoint: Progress file of the crawl. A crawl of the query the
+                checkpoint was saved for jumps to the saved table page and skips
+                the records already emitted; a finished crawl of that query is
+                not repeated. Not used in `http` mode.
+            base_url: Portal root to scrape instead of `BASE_URL`, e.g. the
+                address of a `lhkpn_mock.MockPortal`. Its host then takes the
+                portal host's place in the resource blocking allowlist.
+            tracer: Records timing spans for browser launch, page load, popups,
+                search, row harvest, modal open/wait/close, parsing and
+                pagination. A tracer that only aggregates is used if omitted.
+            metrics: Counters, gauges and histograms of the crawl, e.g. to serve
+                with `lhkpn_metrics.MetricsServer`. Its stage durations come from
+                the tracer's spans.
+            rate_limiter: Paces the portal's documents and XHRs, from every page
+                of the browser context and from `PortalHTTPClient`, adapting its
+                rate to response latency and HTTP 429/5xx responses. Share one
+                instance between scrapers to pace them together.
         """
+        if detail_mode not in ("dom", "network"):
+            raise ValueError(f"Unknown detail mode: {detail_mode}")
+        check_backend(parser_backend)
+        if base_url:
+            self.BASE_URL = base_url.rstrip("/")
+            self.SEARCH_PAGE = f"{self.BASE_URL}/portal/user/login#announ"
+        # The portal host is always allowed; `allowed_hosts` adds to it.
+        allowed_hosts = [urlsplit(self.BASE_URL).hostname] + [h for h in allowed_hosts or [] if h]
         self.headless = headless
+        self.detail_workers = detail_workers
+        self.detail_mode = detail_mode
+        self.parser_backend = parser_backend
+        self.archive = ModalArchive(archive_dir) if archive_dir else None
+        self.parser = ParseStage(parse_executor, parse_workers, parser_backend)
+        self.typed = typed
+        self.known_reports = known_reports
+        self.skipped_known = 0
+        self.checkpoint = checkpoint
+        self.tracer = tracer or Tracer()
+        self.metrics = metrics or Metrics()
+        self.tracer.add_listener(self.metrics.observe_span)
+        self.rate_limiter = rate_limiter
+        self.http = http
+        self.waits = WaitStrategy(timeout=wait_timeout)
+        self.page_length = page_length
+        self.blocker = ResourceBlocker(allowed_hosts=allowed_hosts) if block_resources else None
+        self.query: Optional[str] = None
+        self.captured_requests: Dict[str, Dict[str, Any]] = {}
+        self._detail_link_attrs: Optional[Dict[str, str]] = None
+        self._pending: deque = deque()
+        self._pool: Optional["DetailWorkerPool"] = None
         self.browser: Optional[Browser] = None
         self.context: Optional[BrowserContext] = None
         self.page: Optional[Page] = None
 
-    async def init_browser(self, playwright: Playwright) -> None:
+    async def init_browser(self, playwright: Optional[Playwright], browser: Optional[Browser] = None) -> None:
         """
         Initialize the Playwright browser, context, and page.
+
+        Args:
+            playwright: The Playwright instance used to launch the browser.
+            browser: An already running browser to open the context in instead
+                of launching a new one.
         """
         logger.info("Initializing browser...")
-        self.browser = await playwright.chromium.launch(headless=self.headless)
-        self.context = await self.browser.new_context(
-            viewport={'width': 1280, 'height': 800}
-        )
-        self.page = await self.context.new_page()
-        await Stealth().apply_stealth_async(self.page)
+        if browser:
+            self.browser = browser
+        else:
+            with self.tracer.span("browser_launch", headless=self.headless):
+                self.browser = await playwright.chromium.launch(headless=self.headless)
+        with self.tracer.span("context_setup"):
+            self.context = await self.browser.new_context(
+                viewport={'width': 1280, 'height': 800}
+            )
+            if self.blocker:
+                await self.blocker.install(self.context)
+            if self.rate_limiter:
+                await self.context.route("**/*", self._throttle)
+                self.context.on("requestfinished", self._observe_request)
+                self.context.on("requestfailed", self._observe_failure)
+            self.page = await self.context.new_page()
+            await Stealth().apply_stealth_async(self.page)
+        self.waits.watch(self.page)
+        self.page.on("request", self._record_request)
+
+    def _is_portal_request(self, request: Request) -> bool:
+        return (request.resource_type in THROTTLED_TYPES
+                and urlsplit(request.url).hostname == urlsplit(self.BASE_URL).hostname)
 
-    async def handle_popups(self) -> None:
+    async def _throttle(self, route: Route) -> None:
+        if self._is_portal_request(route.request):
+            await self.rate_limiter.acquire()
+        await route.fallback()
+
+    async def _observe_request(self, request: Request) -> None:
         """
-        Dismiss common popups and modals that appear on the KPK LHKPN site.
+        Report a finished portal request's time to first byte and status to the rate limiter.
         """
-        logger.info("Handling initial popups...")
+        if not self._is_portal_request(request):
+            return
         try:
-            for _ in range(5):
-                await self.page.evaluate("""() => {
-                    const closeButtons = document.querySelectorAll('.remodal-close');
-                    closeButtons.forEach(btn => btn.click());
-                    
-                    const wrappers = document.querySelectorAll('.remodal-wrapper.remodal-is-opened');
-                    wrappers.forEach(w => w.style.display = 'none');
-                    
-                    const backdrop = document.querySelector('.remodal-overlay');
-                    if (backdrop) backdrop.remove();
-                    
-                    document.body.classList.remove('remodal-is-active');
-                    
-                    const bootstrapModals = document.querySelectorAll('.modal.in, .modal.show');
-                    bootstrapModals.forEach(m => {
-                        const close = m.querySelector('button.close, .btn-close');
-                        if (close) close.click();
-                        else m.style.display = 'none';
-                    });
-                }""")
-                await asyncio.sleep(1)
-                active = await self.page.query_selector(".remodal-is-opened, .modal.in, .modal.show")
-                if not active:
+            response = await request.response()
+        except Exception:
+            response = None
+        if response is None:
+            return
+        response_start = request.timing.get("responseStart", -1)
+        self.rate_limiter.observe(response_start / 1000 if response_start >= 0 else None, response.status,
+                                  retry_after=retry_after_seconds(response.headers.get("retry-after")))
+        if response.status == 429 or response.status >= 500:
+            self.metrics.throttled.inc(status=str(response.status))
+        self.metrics.rate_limit.set(self.rate_limiter.rate)
+
+    def _observe_failure(self, request: Request) -> None:
+        if not self._is_portal_request(request) or request.failure == "net::ERR_ABORTED":
+            return
+        self.rate_limiter.observe(failed=True)
+        self.metrics.throttled.inc(status="failed")
+        self.metrics.rate_limit.set(self.rate_limiter.rate)
+
+    def _record_request(self, request: Request) -> None:
+        """
+        Keep the portal's search and comparison XHRs as templates for `PortalHTTPClient`.
+        """
+        if request.resource_type not in ("xhr", "fetch"):
+            return
+        params = request_params(request.url, request.post_data)
+        template = {
+            "url": request.url,
+            "method": request.method,
+            "headers": request.headers,
+            "params": params,
+        }
+        if re.search(self.DETAIL_URL_PATTERN, request.url):
+            if self._detail_link_attrs is not None and "detail" not in self.captured_requests:
+                template["link_attrs"] = self._detail_link_attrs
+                self.captured_requests["detail"] = template
+        elif self.query and any(value == self.query for _, value in params):
+            template["query"] = self.query
+            self.captured_requests["search"] = template
+
+    async def export_http_session(self) -> Dict[str, Any]:
+        """
+        Capture what `PortalHTTPClient` needs to replay the portal's endpoints.
+
+        Must be called after `search`. If no comparison request has been seen yet,
+        the first result with a detail link is opened once to capture it.
+
+        Returns:
+            The cookies, headers and request templates of the current browser session.
+        """
+        if "search" not in self.captured_requests:
+            raise RuntimeError("No search request captured; run search() first.")
+
+        if "detail" not in self.captured_requests:
+            for i, row in enumerate(await self.harvest_rows()):
+                if row["has_detail"]:
+                    data = self.build_record(row["cells"])
+                    await self.fetch_detail(self.page, i, f"{data['name']} ({data['tanggal_lapor']})")
                     break
-        except Exception as e:
-            logger.error(f"Error handling popups: {e}")
 
-    async def search(self, name: str) -> None:
+        search = self.captured_requests["search"]
+        session = {
+            "cookies": await self.context.cookies(),
+            "headers": {k: v for k, v in search["headers"].items() if k.lower() not in SKIPPED_HEADERS and not k.startswith(":")},
+            "search": search,
+            "detail": None,
+        }
+
+        detail = self.captured_requests.get("detail")
+        if detail:
+            attrs = {k: v for k, v in detail["link_attrs"].items() if v}
+            param_attrs = {}
+            for key, value in detail["params"]:
+                for attr, attr_value in attrs.items():
+                    if value == attr_value:
+                        param_attrs[key] = attr
+                        break
+            url_path = urlsplit(detail["url"]).path
+            url_attrs = {attr: value for attr, value in attrs.items()
+                         if attr.startswith("data-") and attr not in param_attrs.values() and value in url_path}
+            session["detail"] = dict(detail, param_attrs=param_attrs, url_attrs=url_attrs)
+        else:
+            logger.warning("No comparison request captured; HTTP mode will return basic data only.")
+        return session
+
+    async def handle_popups(self, page: Optional[Page] = None) -> None:
+        """
+        Dismiss common popups and modals that appear on the KPK LHKPN site.
+
+        Args:
+            page: The page to clean up. Defaults to the scraper's main page.
+        """
+        page = page or self.page
+        logger.info("Handling initial popups...")
+        with self.tracer.span("handle_popups") as span:
+            try:
+                for attempt in range(1, 6):
+                    span["attempts"] = attempt
+                    await page.evaluate(DISMISS_POPUPS_JS)
+                    if await self.waits.popups_closed(page):
+                        break
+            except Exception as e:
+                logger.error(f"Error handling popups: {e}")
+
+    async def search(self, name: str, page: Optional[Page] = None) -> None:
         """
         Search for a person's name on the LHKPN portal.
 
         Args:
             name: The name to search for.
+            page: The page to search on. Defaults to the scraper's main page.
         """
-        logger.info(f"Searching for '{name}'...")
-        try:
-            await self.page.goto(self.SEARCH_PAGE, timeout=60000, wait_until="load")
-        except Exception as e:
-            logger.warning(f"Initial goto timeout or error: {e}. Retrying with relaxed wait...")
-            await self.page.goto(self.SEARCH_PAGE, timeout=60000, wait_until="domcontentloaded")
+        await self.open_portal(page)
+        await self.submit_search(name, page)
 
-        await self.handle_popups()
+    async def open_portal(self, page: Optional[Page] = None) -> None:
+        """
+        Load the portal, dismiss its popups and bring up the announcement search form.
 
-        try:
-            announ_tab = self.page.locator("a.page-scroll[href='#announ'], a.anchor-eannoun").first
-            await announ_tab.scroll_into_view_if_needed()
-            await announ_tab.click()
-            await asyncio.sleep(2)
-        except Exception as e:
-            logger.warning(f"Could not click announcement tab: {e}")
-            await self.page.evaluate("window.location.hash = '#announ'")
-            await asyncio.sleep(1)
+        Args:
+            page: The page to load the portal on. Defaults to the scraper's main page.
+        """
+        page = page or self.page
+        logger.info("Opening the LHKPN portal...")
+        with self.tracer.span("page_load") as span:
+            try:
+                await page.goto(self.SEARCH_PAGE, timeout=60000, wait_until="load")
+            except Exception as e:
+                logger.warning(f"Initial goto timeout or error: {e}. Retrying with relaxed wait...")
+                span["retried"] = True
+                self.metrics.retries.inc(operation="page_load")
+                await page.goto(self.SEARCH_PAGE, timeout=60000, wait_until="domcontentloaded")
+
+        await self.handle_popups(page)
+
+        with self.tracer.span("announ_tab"):
+            try:
+                announ_tab = page.locator("a.page-scroll[href='#announ'], a.anchor-eannoun").first
+                await announ_tab.scroll_into_view_if_needed()
+                await announ_tab.click()
+            except Exception as e:
+                logger.warning(f"Could not click announcement tab: {e}")
+                await page.evaluate("window.location.hash = '#announ'")
+
+            try:
+                await page.wait_for_selector(SEARCH_INPUT_SELECTOR, timeout=20000)
+            except:
+                logger.warning("Search input not found, attempting to refresh hash and wait again...")
+                self.metrics.retries.inc(operation="search_form")
+                await page.evaluate("window.location.hash = '#announ'")
+                await page.wait_for_selector(SEARCH_INPUT_SELECTOR, timeout=20000)
 
-        input_selector = "#CARI_NAMA, input[name='CARI_NAMA']"
+    async def portal_ready(self, page: Optional[Page] = None) -> bool:
+        """
+        Check whether the search form can be used without reloading the portal.
+
+        Args:
+            page: The page to check. Defaults to the scraper's main page.
+
+        Returns:
+            True if the search input is visible and no popup covers the page.
+        """
+        page = page or self.page
         try:
-            await self.page.wait_for_selector(input_selector, timeout=20000)
-        except:
-            logger.warning("Search input not found, attempting to refresh hash and wait again...")
-            await self.page.evaluate("window.location.hash = '#announ'")
-            await self.page.wait_for_selector(input_selector, timeout=20000)
-
-        input_field = self.page.locator(input_selector).first
-        await input_field.scroll_into_view_if_needed()
+            if await page.query_selector(ACTIVE_MODALS_SELECTOR):
+                return False
+            return await page.locator(SEARCH_INPUT_SELECTOR).first.is_visible()
+        except Exception:
+            return False
+
+    async def submit_search(self, name: str, page: Optional[Page] = None) -> None:
+        """
+        Run a search from the already loaded announcement form.
+
+        Args:
+            name: The name to search for.
+            page: The page holding the search form. Defaults to the scraper's main page.
+        """
+        page = page or self.page
+        if page is self.page:
+            self.query = name
+        logger.info(f"Searching for '{name}'...")
+
+        with self.tracer.span("search"):
+            input_field = page.locator(SEARCH_INPUT_SELECTOR).first
+            await input_field.scroll_into_view_if_needed()
         
-        await input_field.click()
-        await self.page.keyboard.press("Control+A")
-        await self.page.keyboard.press("Backspace")
-        await input_field.fill(name)
+            await input_field.click()
+            await page.keyboard.press("Control+A")
+            await page.keyboard.press("Backspace")
+            await input_field.fill(name)
         
-        search_btn = self.page.locator("button[type='submit'].btn-success")
-        await search_btn.scroll_into_view_if_needed()
-        await search_btn.click()
+            search_btn = page.locator("button[type='submit'].btn-success")
+            await search_btn.scroll_into_view_if_needed()
+            armed = await self.waits.arm_table_draw(page)
+            await search_btn.click()
         
-        logger.info("Waiting for search results...")
+            logger.info("Waiting for search results...")
+            try:
+                table_row_selector = "#table-pengumuman tbody tr, table.table-striped tbody tr"
+                await page.wait_for_selector(table_row_selector, timeout=30000)
+                logger.info("Found search results table.")
+            except Exception as e:
+                logger.error(f"Results table did not appear: {e}")
+                await page.screenshot(path="search_failure.png")
+            
+                if await page.locator("text='Data Tidak Ditemukan'").is_visible():
+                    logger.info("Search returned no results.")
+        
+            await self.waits.table_drawn(page, armed)
+
+        if self.page_length:
+            await self.set_page_length(page, self.page_length)
+
+    async def set_page_length(self, page: Page, length: Union[int, str] = "max") -> Optional[int]:
+        """
+        Change how many rows the results table shows per page.
+
+        Uses the DataTables `page.len()` API when available and the table's
+        length select otherwise.
+
+        Args:
+            page: The page holding the results table.
+            length: Rows per page, or "max" for the largest option the table offers.
+
+        Returns:
+            The page length that was applied, or None if it could not be changed.
+        """
+        with self.tracer.span("set_page_length", length=length) as span:
+            armed = await self.waits.arm_table_draw(page)
+            result = await page.evaluate(SET_PAGE_LENGTH_JS, length)
+            if result is None:
+                logger.warning(f"Could not set the results page length to {length}.")
+                return None
+            applied = result["length"]
+            span["redrawn"] = result["redrawn"]
+            if not result["redrawn"]:
+                # No draw fires when the table already shows this many rows.
+                logger.debug(f"Results page length already {'all' if applied == -1 else applied}.")
+                return applied
+            logger.info(f"Results page length set to {'all' if applied == -1 else applied}.")
+            await self.waits.table_drawn(page, armed)
+        return applied
+
+    async def harvest_rows(self, page: Optional[Page] = None, row_selector: str = ROW_SELECTOR) -> List[Dict[str, Any]]:
+        """
+        Read every cell of every visible result row in a single browser round-trip.
+
+        Args:
+            page: The page holding the results table. Defaults to the scraper's main page.
+            row_selector: CSS selector matching the result table rows.
+
+        Returns:
+            A list of dictionaries with the row's cell texts and whether it has a detail link.
+        """
+        page = page or self.page
+        with self.tracer.span("harvest_rows") as span:
+            rows = await page.evaluate("""(selector) => {
+                return Array.from(document.querySelectorAll(selector)).map(row => ({
+                    cells: Array.from(row.querySelectorAll('td')).map(td => td.innerText),
+                    has_detail: row.querySelector('.perbandingan-announcement, i.fa-history, i.fa-file-text-o') !== null
+                }));
+            }""", row_selector)
+            span["rows"] = len(rows)
+        return rows
+
+    @staticmethod
+    def build_record(cells: List[str]) -> Dict[str, Any]:
+        """
+        Build a basic record from the cell texts of a result row.
+
+        The portal renders the summary columns either from offset 6 or from offset 1,
+        so the offset-6 layout is tried first and offset 1 is used as a fallback.
+
+        Args:
+            cells: Inner text of each `td` in the row.
+
+        Returns:
+            A record dictionary with empty asset categories.
+        """
+        def get_cell_text(idx):
+            return cells[idx] if idx < len(cells) else ""
+
+        name = get_cell_text(6)
+        lembaga = get_cell_text(7)
+        unit_kerja = get_cell_text(8)
+        jabatan = get_cell_text(9)
+        tanggal_lapor = get_cell_text(10)
+        total_harta = get_cell_text(12)
+        jenis_laporan = get_cell_text(11)
+        
+        if not name.strip() or "Rp." not in total_harta:
+            name = get_cell_text(1)
+            lembaga = get_cell_text(2)
+            unit_kerja = get_cell_text(3)
+            jabatan = get_cell_text(4)
+            tanggal_lapor = get_cell_text(5)
+            total_harta = get_cell_text(7)
+            jenis_laporan = get_cell_text(6)
+
+        return {
+            "name": name.strip(),
+            "lembaga": lembaga.strip(),
+            "unit_kerja": unit_kerja.strip(),
+            "jabatan": jabatan.strip(),
+            "tanggal_lapor": tanggal_lapor.strip(),
+            "jenis_laporan": jenis_laporan.strip(),
+            "total_harta": total_harta.strip(),
+            "tanah_bangunan": [],
+            "transportasi": [],
+            "bergerak_lainnya": [],
+            "surat_berharga": [],
+            "kas": [],
+            "harta_lainnya": [],
+            "hutang": []
+        }
+
+    async def fetch_detail(self, page: Page, row_index: int, label: str) -> Optional[str]:
+        """
+        Open the comparison modal of a result row and return its HTML.
+
+        Args:
+            page: The page holding the results table.
+            row_index: Index of the row on the current table page.
+            label: Human readable description of the row, used for logging.
+
+        Returns:
+            The modal HTML, or None if the modal could not be opened.
+        """
+        row = page.locator(ROW_SELECTOR).nth(row_index)
+        history_btn = row.locator("a.perbandingan-announcement, a[data-toggle='modal'][data-target='#modal-perbandingan-announcement-lhkpn']").first
+        if not (await history_btn.count() > 0 and await history_btn.is_visible()):
+            logger.info(f"No history link button visible for {label}")
+            return None
+
+        logger.info(f"Opening details for {label}...")
+        if "detail" not in self.captured_requests:
+            self._detail_link_attrs = await history_btn.evaluate(
+                "a => Object.fromEntries(Array.from(a.attributes).map(attr => [attr.name, attr.value]))")
+        if self.detail_mode == "network":
+            return await self._capture_detail(page, history_btn, label)
+
+        armed = await self.waits.arm_modal(page)
+        modal_selector = "#modal-perbandingan-announcement-lhkpn"
         try:
-            table_row_selector = "#table-pengumuman tbody tr, table.table-striped tbody tr"
-            await self.page.wait_for_selector(table_row_selector, timeout=30000)
-            logger.info("Found search results table.")
-        except Exception as e:
-            logger.error(f"Results table did not appear: {e}")
-            await self.page.screenshot(path="search_failure.png")
+            with self.tracer.span("modal_open"):
+                await history_btn.click()
+                await page.wait_for_selector(f"{modal_selector} table", timeout=15000)
+            self.metrics.modals_opened.inc()
+            with self.tracer.span("modal_wait"):
+                await self.waits.modal_opened(page, armed)
+                await self.waits.network_idle(page)
+                modal_html = await page.inner_html(modal_selector)
             
-            if await self.page.locator("text='Data Tidak Ditemukan'").is_visible():
-                logger.info("Search returned no results.")
+            with self.tracer.span("modal_close"):
+                close_btn = page.locator(f"{modal_selector} .remodal-close, {modal_selector} .btn-danger, button[data-dismiss='modal']").first
+                if await close_btn.is_visible():
+                    await close_btn.click()
+                    await page.wait_for_selector(modal_selector, state="hidden", timeout=5000)
+                else:
+                    await page.keyboard.press("Escape")
+                    await self.waits.modal_closed(page, armed)
+            return modal_html
+        except Exception as e:
+            logger.error(f"Error extracting modal for {label}: {e}")
+            self.metrics.modal_failures.inc()
+            with self.tracer.span("modal_close", after_error=True):
+                await page.keyboard.press("Escape")
+                await self.waits.modal_closed(page, armed)
+            return None
+
+    def _is_detail_response(self, response: Response) -> bool:
+        return (response.request.resource_type in ("xhr", "fetch")
+                and re.search(self.DETAIL_URL_PATTERN, response.url) is not None)
+
+    async def _capture_detail(self, page: Page, history_btn: Locator, label: str) -> Optional[str]:
+        """
+        Click a row's comparison link and read the modal content straight from its XHR response.
+
+        The page only opens the modal once it has read the response body, so the
+        modal is awaited before it is dismissed; dismissing earlier would leave
+        it open over the next row's link.
+        """
+        armed = await self.waits.arm_modal(page)
+        response = None
+        try:
+            with self.tracer.span("modal_capture") as span:
+                async with page.expect_response(self._is_detail_response, timeout=15000) as response_info:
+                    await history_btn.click()
+                response = await response_info.value
+                span["status"] = response.status
+                if not response.ok:
+                    logger.error(f"Detail request for {label} failed with HTTP {response.status}")
+                    self.metrics.modal_failures.inc()
+                    return None
+                self.metrics.modals_opened.inc()
+                return extract_detail_html(await response.text())
+        except Exception as e:
+            logger.error(f"Error capturing detail response for {label}: {e}")
+            self.metrics.modal_failures.inc()
+            return None
+        finally:
+            with self.tracer.span("modal_close"):
+                if response is not None:
+                    await self.waits.modal_opened(page, armed)
+                await page.evaluate(DISMISS_POPUPS_JS)
+                await self.waits.popups_closed(page)
+
+    async def next_page(self, page: Optional[Page] = None) -> bool:
+        """
+        Advance the results table to its next page.
+
+        Args:
+            page: The page holding the results table. Defaults to the scraper's main page.
+
+        Returns:
+            True if the table moved to the next page, False on the last page.
+        """
+        page = page or self.page
+        next_btn = page.locator("#table-pengumuman_next, li.next a, .paginate_button.next a, a:has-text('Next'), a:has-text('>>')").first
         
-        await asyncio.sleep(2)
+        if await next_btn.count() > 0:
+            is_visible = await next_btn.is_visible()
+            is_disabled = await page.evaluate("""(btn) => {
+                const parent = btn.parentElement;
+                return btn.classList.contains('disabled') || 
+                       (parent && parent.classList.contains('disabled')) ||
+                       btn.getAttribute('aria-disabled') === 'true' ||
+                       btn.disabled;
+            }""", await next_btn.element_handle())
+            
+            if is_visible and not is_disabled:
+                logger.info("Clicking Next page...")
+                with self.tracer.span("next_page"):
+                    await next_btn.scroll_into_view_if_needed()
+                    armed = await self.waits.arm_table_draw(page)
+                    await next_btn.click()
+                    await self.waits.table_drawn(page, armed)
+                self.metrics.page_transitions.inc()
+                return True
+            logger.info("Reached last page.")
+        else:
+            logger.info("No Next page button found.")
+        return False
 
-    async def extract_and_detail(self, max_results: Union[int, float] = float('inf')) -> List[Dict[str, Any]]:
+    async def goto_table_page(self, page: Page, index: int, current: int = 0) -> bool:
+        """
+        Jump the results table to a given page.
+
+        Uses the DataTables page API when the portal exposes it and falls back
+        to clicking Next from the current page otherwise.
+
+        Args:
+            page: The page holding the results table.
+            index: Zero-based index of the table page to show.
+            current: Zero-based index of the table page currently shown.
+
+        Returns:
+            True if the table now shows the requested page.
+        """
+        if await self.waits.arm_table_draw(page):
+            with self.tracer.span("goto_table_page", index=index):
+                await page.evaluate("(index) => jQuery('#table-pengumuman').DataTable().page(index).draw('page')", index)
+                await self.waits.table_drawn(page)
+            self.metrics.page_transitions.inc()
+            return True
+
+        if index < current:
+            return False
+        for _ in range(index - current):
+            if not await self.next_page(page):
+                return False
+        return True
+
+    async def extract_and_detail(self, max_results: Union[int, float] = float('inf'),
+                                 with_details: bool = True) -> List[Dict[str, Any]]:
         """
         Extract results from the table and attempt to get detailed asset information.
 
         Args:
             max_results: Maximum number of records to extract.
+            with_details: Whether to fetch each row's detail modal.
 
         Returns:
-            A list of dictionaries containing the extracted data.
+            A list of dictionaries containing the extracted data, or `Report` objects when `typed` is set.
+        """
+        return [data async for data in self.iter_records(max_results=max_results, with_details=with_details)]
+
+    async def iter_records(self, max_results: Union[int, float] = float('inf'), with_details: bool = True,
+                           buffer: int = 0) -> AsyncIterator[Dict[str, Any]]:
         """
+        Extract results from the table and yield each record as soon as it is complete.
+
+        Records are yielded in table order. The crawl is throttled by the consumer:
+        with `buffer=0` it only advances while the consumer asks for the next record,
+        otherwise it runs ahead in a background task until `buffer` records are
+        waiting. With a detail worker pool, at most twice as many detail jobs as
+        workers are in flight.
+
+        Args:
+            max_results: Maximum number of records to extract.
+            with_details: Whether to fetch each row's detail modal. Without it,
+                records carry the table columns only.
+            buffer: Number of finished records the crawl may keep ahead of the consumer.
+
+        Yields:
+            Dictionaries containing the extracted data, or `Report` objects when `typed` is set.
+        """
+        records = self._crawl(max_results, with_details)
+        if buffer <= 0:
+            try:
+                async for data in records:
+                    self.metrics.record_scraped()
+                    yield data
+            finally:
+                await records.aclose()
+            return
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=buffer)
+
+        async def produce():
+            try:
+                async for data in records:
+                    await queue.put((data, None))
+                await queue.put((None, None))
+            except Exception as e:
+                await queue.put((None, e))
+
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                data, error = await queue.get()
+                if error:
+                    raise error
+                if data is None:
+                    return
+                self.metrics.record_scraped()
+                yield data
+        finally:
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+            await records.aclose()
+
+    async def _crawl(self, max_results: Union[int, float], with_details: bool) -> AsyncIterator[Dict[str, Any]]:
         logger.info(f"Extracting results (max: {max_results})...")
         
-        all_data = []
-        page_num = 1
-        
-        while len(all_data) < max_results:
-            logger.info(f"Processing page {page_num}...")
-            
-            row_selector = "table.table-striped tbody tr, #table-pengumuman tbody tr"
-            try:
-                await self.page.wait_for_selector(row_selector, timeout=10000)
-            except:
-                logger.info(f"No results found on page {page_num} or timeout.")
-                break
+        extracted = 0
+        skipped = 0
+        last_page = False
+        start_page = resume_row = 0
+        checkpoint = self.checkpoint
+        if checkpoint and checkpoint.done(self.query):
+            logger.info(f"Checkpoint {checkpoint.path} records a finished crawl of '{self.query}', nothing to resume.")
+            return
+        if checkpoint and checkpoint.start(self.query):
+            start_page, resume_row = checkpoint.page, checkpoint.row
+            extracted = len(checkpoint.emitted)
+            logger.info(f"Resuming '{self.query}' at page {start_page + 1}, row {resume_row}...")
+            if start_page and not await self.goto_table_page(self.page, start_page):
+                logger.warning(f"Could not jump to page {start_page + 1}, re-reading from the first page.")
+                start_page = resume_row = 0
+        page_num = start_page + 1
 
-            rows = self.page.locator(row_selector)
-            count = await rows.count()
-            
-            if count > 0:
-                first_row_cells = await rows.nth(0).locator("td").count()
-                if first_row_cells < 5:
-                    logger.info("Page seems empty or loading message visible.")
+        pool = None
+        pending = self._pending = deque()
+        max_pending = 2 * self.detail_workers
+        if with_details and self.detail_workers > 1:
+            pool = self._pool = DetailWorkerPool(self, self.detail_workers)
+            await pool.start()
+        
+        try:
+            while extracted < max_results:
+                logger.info(f"Processing page {page_num}...")
+                
+                try:
+                    await self.page.wait_for_selector(ROW_SELECTOR, timeout=10000)
+                except:
+                    logger.info(f"No results found on page {page_num} or timeout.")
                     break
 
-            logger.info(f"Found {count} rows on page {page_num}.")
-            
-            for i in range(count):
-                if len(all_data) >= max_results:
-                    break
+                harvested = await self.harvest_rows()
+                count = len(harvested)
                 
-                row = rows.nth(i)
-                cells = row.locator("td")
+                if count > 0:
+                    if len(harvested[0]["cells"]) < 5:
+                        logger.info("Page seems empty or loading message visible.")
+                        break
+
+                logger.info(f"Found {count} rows on page {page_num}.")
                 
-                try:
-                    async def get_cell_text(idx):
-                        try:
-                            if await cells.nth(idx).count() > 0:
-                                return await cells.nth(idx).inner_text()
-                        except:
-                            pass
-                        return ""
-
-                    name = await get_cell_text(6)
-                    lembaga = await get_cell_text(7)
-                    unit_kerja = await get_cell_text(8)
-                    jabatan = await get_cell_text(9)
-                    tanggal_lapor = await get_cell_text(10)
-                    total_harta = await get_cell_text(12)
-                    jenis_laporan = await get_cell_text(11)
-                    
-                    if not name.strip() or "Rp." not in total_harta:
-                        name = await get_cell_text(1)
-                        lembaga = await get_cell_text(2)
-                        unit_kerja = await get_cell_text(3)
-                        jabatan = await get_cell_text(4)
-                        tanggal_lapor = await get_cell_text(5)
-                        total_harta = await get_cell_text(7)
-                        jenis_laporan = await get_cell_text(6)
-
-                    data = {
-                        "name": name.strip(),
-                        "lembaga": lembaga.strip(),
-                        "unit_kerja": unit_kerja.strip(),
-                        "jabatan": jabatan.strip(),
-                        "tanggal_lapor": tanggal_lapor.strip(),
-                        "jenis_laporan": jenis_laporan.strip(),
-                        "total_harta": total_harta.strip(),
-                        "tanah_bangunan": [],
-                        "transportasi": [],
-                        "bergerak_lainnya": [],
-                        "surat_berharga": [],
-                        "kas": [],
-                        "harta_lainnya": [],
-                        "hutang": []
-                    }
-                    
-                    action_link = row.locator(".perbandingan-announcement, i.fa-history, i.fa-file-text-o")
-                    
-                    if await action_link.count() > 0:
-                        history_btn = row.locator("a.perbandingan-announcement, a[data-toggle='modal'][data-target='#modal-perbandingan-announcement-lhkpn']").first
-                        if await history_btn.count() > 0 and await history_btn.is_visible():
-                            logger.info(f"Opening details for {name.strip()} ({tanggal_lapor.strip()})...")
-                            await history_btn.click()
-                            
-                            modal_selector = "#modal-perbandingan-announcement-lhkpn"
-                            try:
-                                await self.page.wait_for_selector(f"{modal_selector} table", timeout=15000)
-                                await asyncio.sleep(1.5)
-                                
-                                modal_html = await self.page.inner_html(modal_selector)
-                                details = self.parse_detail(modal_html)
-                                data.update(details)
-                                
-                                close_btn = self.page.locator(f"{modal_selector} .remodal-close, {modal_selector} .btn-danger, button[data-dismiss='modal']").first
-                                if await close_btn.is_visible():
-                                    await close_btn.click()
-                                    await self.page.wait_for_selector(modal_selector, state="hidden", timeout=5000)
-                                else:
-                                    await self.page.keyboard.press("Escape")
-                                    await asyncio.sleep(1)
-                            except Exception as e:
-                                logger.error(f"Error extracting modal for {name}: {e}")
-                                await self.page.keyboard.press("Escape")
-                                await asyncio.sleep(1)
-                        else:
-                            logger.info(f"No history link button visible for {name.strip()} ({tanggal_lapor.strip()})")
-                    else:
-                        logger.info(f"No detail link for {name.strip()} ({tanggal_lapor.strip()}), saving basic data.")
+                for i, harvested_row in enumerate(harvested):
+                    if extracted >= max_results:
+                        break
                     
-                    all_data.append(data)
-                except Exception as e:
-                    logger.error(f"Error processing row {i}: {e}")
+                    if page_num - 1 == start_page and i < resume_row:
+                        continue
 
-            next_btn = self.page.locator("#table-pengumuman_next, li.next a, .paginate_button.next a, a:has-text('Next'), a:has-text('>>')").first
-            
-            if await next_btn.count() > 0:
-                is_visible = await next_btn.is_visible()
-                is_disabled = await self.page.evaluate("""(btn) => {
-                    const parent = btn.parentElement;
-                    return btn.classList.contains('disabled') || 
-                           (parent && parent.classList.contains('disabled')) ||
-                           btn.getAttribute('aria-disabled') === 'true' ||
-                           btn.disabled;
-                }""", await next_btn.element_handle())
-                
-                if is_visible and not is_disabled:
-                    logger.info("Clicking Next page...")
-                    await next_btn.scroll_into_view_if_needed()
-                    await next_btn.click()
-                    page_num += 1
-                    await asyncio.sleep(5)
-                else:
-                    logger.info("Reached last page.")
+                    try:
+                        data = self.build_record(harvested_row["cells"])
+                        key = natural_key(data)
+                        if checkpoint and key in checkpoint.emitted:
+                            continue
+                        if self.known_reports is not None and key in self.known_reports:
+                            skipped += 1
+                            continue
+                        label = f"{data['name']} ({data['tanggal_lapor']})"
+                        future = None
+                        
+                        if with_details:
+                            if not harvested_row["has_detail"]:
+                                logger.info(f"No detail link for {label}, saving basic data.")
+                            elif pool:
+                                future = pool.submit(self.query, page_num - 1, i, label, key)
+                            else:
+                                modal_html = await self.fetch_detail(self.page, i, label)
+                                if modal_html is not None:
+                                    future = self.parse_details(modal_html)
+                        
+                        pending.append((data, future, (page_num - 1, i, key)))
+                        extracted += 1
+                    except Exception as e:
+                        logger.error(f"Error processing row {i}: {e}")
+
+                    while pending and (pending[0][1] is None or pending[0][1].done() or len(pending) > max_pending):
+                        data, future, position = pending.popleft()
+                        yield await self._complete(data, future)
+                        if checkpoint:
+                            checkpoint.record(*position)
+
+                logger.info(f"Pipeline after page {page_num}: {self.pipeline_stats()}")
+                if checkpoint:
+                    # The page only counts as done once all of its records are out.
+                    while pending:
+                        data, future, position = pending.popleft()
+                        yield await self._complete(data, future)
+                        checkpoint.record(*position)
+                    checkpoint.page_done(page_num - 1)
+                if extracted >= max_results:
                     break
-            else:
-                logger.info("No Next page button found.")
-                break
-                
-        return all_data
+                if not await self.next_page():
+                    last_page = True
+                    break
+                page_num += 1
+
+            while pending:
+                data, future, position = pending.popleft()
+                yield await self._complete(data, future)
+                if checkpoint:
+                    checkpoint.record(*position)
+            if checkpoint and (last_page or extracted >= max_results):
+                checkpoint.finish()
+            elif checkpoint:
+                logger.warning(f"Crawl stopped before the last page; resuming continues from page {checkpoint.page + 1}.")
+        finally:
+            if checkpoint:
+                checkpoint.save()
+            if skipped:
+                self.skipped_known += skipped
+                logger.info(f"Skipped {skipped} reports that were already fetched.")
+            if pool:
+                await pool.close()
+            self._pool = None
+
+    async def _complete(self, data: Dict[str, Any], future: Optional[asyncio.Future]) -> Union[Dict[str, Any], Report]:
+        if future is not None:
+            try:
+                details = await future
+            except Exception as e:
+                logger.error(f"Error parsing detail for {data['name']} ({data['tanggal_lapor']}): {e}")
+                details = None
+            if details is not None:
+                data.update(details)
+        return Report.from_dict(data) if self.typed else data
+
+    def pipeline_stats(self) -> Dict[str, int]:
+        """
+        Return the queue depths of the detail pipeline.
+
+        `fetch_queue_depth` counts detail jobs waiting for a worker page and
+        `parse_queue_depth` modals waiting for or being parsed; whichever keeps
+        growing is the bottleneck. `records_pending` counts extracted records
+        held back until their details are ready.
+
+        Returns:
+            Dictionary of current and peak queue depths.
+        """
+        stats = self.parser.stats()
+        stats["fetch_queue_depth"] = self._pool.queue.qsize() if self._pool else 0
+        stats["records_pending"] = sum(1 for _, future, _ in self._pending if future is not None and not future.done())
+        return stats
 
     async def run(self, query: str, max_results: Union[int, float] = float('inf')) -> List[Dict[str, Any]]:
         """
-        Run the scraper.
+        Run the scraper and log where the time went.
 
         Args:
             query: The search query (name).
@@ -301,110 +983,340 @@ class LHKPNScraper:
         Returns:
             List of scraped records.
         """
-        async with async_playwright() as p:
-            await self.init_browser(p)
-            try:
-                await self.search(query)
-                all_data = await self.extract_and_detail(max_results=max_results)
-                return all_data
-            finally:
-                if self.browser:
-                    await self.browser.close()
+        try:
+            async with LHKPNSession(self) as session:
+                return await session.query(query, max_results=max_results)
+        finally:
+            self.tracer.log_summary()
 
-    def parse_detail(self, html: str) -> Dict[str, List[Dict[str, str]]]:
+    async def details_from_html(self, modal_html: str) -> Dict[str, Any]:
         """
-        Parse the detail modal HTML using BeautifulSoup.
+        Parse a detail modal with the configured backend and parse stage, archiving its HTML if enabled.
+
+        Args:
+            modal_html: HTML content of the modal.
+
+        Returns:
+            Dictionary of categorized asset details, plus `modal_sha256` when archiving.
+        """
+        with self.tracer.span("parse_detail", executor=self.parser.mode, html_bytes=len(modal_html)):
+            parsed = self.parser.submit(modal_html)
+            digest = self.archive.put(modal_html) if self.archive else None
+            details = await parsed
+        if digest:
+            details[ARCHIVE_KEY] = digest
+        return details
+
+    def parse_details(self, modal_html: str) -> asyncio.Task:
+        """
+        Start parsing a detail modal in the background.
+
+        Returns:
+            A task resolving to the result of `details_from_html`.
+        """
+        return asyncio.ensure_future(self.details_from_html(modal_html))
+
+    @staticmethod
+    def parse_detail(html: str, backend: str = "bs4") -> Dict[str, List[Dict[str, str]]]:
+        """
+        Parse the detail modal HTML.
 
         Args:
             html: HTML content of the modal.
+            backend: Parser backend, "bs4" or "lxml". See `lhkpn_parse.parse_detail`.
 
         Returns:
             Dictionary of categorized asset details.
         """
-        soup = BeautifulSoup(html, 'html.parser')
-        data = {
-            "tanah_bangunan": [],
-            "transportasi": [],
-            "bergerak_lainnya": [],
-            "surat_berharga": [],
-            "kas": [],
-            "harta_lainnya": [],
-            "hutang": []
-        }
-        
-        category_map = {
-            "TANAH DAN BANGUNAN": "tanah_bangunan",
-            "ALAT TRANSPORTASI DAN MESIN": "transportasi",
-            "HARTA BERGERAK LAINNYA": "bergerak_lainnya",
-            "SURAT BERHARGA": "surat_berharga",
-            "KAS DAN SETARA KAS": "kas",
-            "HARTA LAINNYA": "harta_lainnya",
-            "HUTANG": "hutang"
-        }
-        
-        current_cat = None
-        
-        tbody = soup.find("tbody", class_="data_perbandingan_lhkpn")
-        if not tbody:
-            return data
-            
-        rows = tbody.find_all("tr")
-        
-        for row in rows:
-            cells = row.find_all(["td", "th"])
-            
-            new_cat_found = False
-            if len(cells) >= 3:
-                c1_text = cells[1].get_text(strip=True).upper()
-                c2_text = cells[2].get_text(strip=True).upper()
-                
-                for cat_name, key in category_map.items():
-                    if cat_name in c2_text or cat_name in row.get_text(" ", strip=True).upper()[:50]:
-                        header_indicators = ["A.", "B.", "C.", "D.", "E.", "F.", "II.", "III."]
-                        if any(ind in c1_text or ind in cells[0].get_text(strip=True).upper() for ind in header_indicators):
-                            current_cat = key
-                            new_cat_found = True
-                            break
-            
-            if new_cat_found:
-                continue
-                
-            if current_cat:
-                found_index = False
-                desc = ""
-                val = ""
-                
-                for j in range(min(len(cells), 4)):
-                    cell_text = cells[j].get_text(strip=True)
-                    if cell_text and cell_text[0].isdigit() and cell_text.endswith("."):
-                        found_index = True
-                        if j + 1 < len(cells):
-                            desc = cells[j+1].get_text(strip=True)
-                            for k in range(j + 2, len(cells)):
-                                k_text = cells[k].get_text(strip=True)
-                                if k_text and (k_text[0].isdigit() or (len(k_text) > 1 and k_text[0] in "0123456789")):
-                                    val = k_text
-                                    break
+        return parse_detail(html, backend)
+
+class LHKPNSession:
+    """
+    A warm browser session that answers many queries.
+
+    The browser, context and loaded announcement tab are kept alive between
+    queries; the portal is only reloaded, and popups only dismissed again, when
+    the search form is no longer usable.
+
+    Example:
+        async with LHKPNSession(headless=True) as session:
+            for name in names:
+                records = await session.query(name, max_results=10)
+    """
+
+    def __init__(self, scraper: Optional[LHKPNScraper] = None, browser: Optional[Browser] = None, **scraper_kwargs):
+        """
+        Initialize the session.
+
+        Args:
+            scraper: The scraper to drive. A new one is built from `scraper_kwargs` if omitted.
+            browser: A running browser to share. The session then opens its own
+                context in it and leaves the browser running on exit.
+            **scraper_kwargs: Arguments for `LHKPNScraper` when no scraper is given.
+        """
+        self.scraper = scraper or LHKPNScraper(**scraper_kwargs)
+        self.shared_browser = browser
+        self.queries = 0
+        self.http_client = None
+        self._stack: Optional[AsyncExitStack] = None
+        self._sampler: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> "LHKPNSession":
+        self._stack = AsyncExitStack()
+        try:
+            if self.shared_browser:
+                await self.scraper.init_browser(None, browser=self.shared_browser)
+            else:
+                playwright = await self._stack.enter_async_context(async_playwright())
+                await self.scraper.init_browser(playwright)
+            self._stack.push_async_callback(self._close_browser)
+            if self.scraper.metrics.sample_interval > 0:
+                self._sampler = asyncio.create_task(self._sample_metrics())
+            await self.scraper.open_portal()
+        except BaseException:
+            await self._stack.aclose()
+            raise
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self._stack.aclose()
+
+    async def _close_browser(self) -> None:
+        if self._sampler:
+            self._sampler.cancel()
+            await asyncio.gather(self._sampler, return_exceptions=True)
+        logger.info(f"Parse stage: {self.scraper.parser.stats()}")
+        self.scraper.parser.shutdown()
+        if self.scraper.blocker:
+            logger.info(f"Resource blocking: {self.scraper.blocker.summary()}")
+        if self.scraper.rate_limiter:
+            logger.info(f"Portal rate limiter: {self.scraper.rate_limiter.stats()}")
+        if self.shared_browser:
+            if self.scraper.context:
+                await self.scraper.context.close()
+        elif self.scraper.browser:
+            await self.scraper.browser.close()
+
+    async def _sample_metrics(self) -> None:
+        """
+        Export the pipeline's queue depths and the main page's JS heap and DOM size until the session closes.
+        """
+        metrics = self.scraper.metrics
+        session_id = metrics.new_session()
+        cdp = None
+        try:
+            cdp = await self.scraper.context.new_cdp_session(self.scraper.page)
+            await cdp.send("Performance.enable")
+        except Exception as e:
+            logger.debug(f"Browser memory metrics unavailable: {e}")
+            cdp = None
+        try:
+            while True:
+                stats = self.scraper.pipeline_stats()
+                for queue, key in (("parse", "parse_queue_depth"), ("fetch", "fetch_queue_depth"),
+                                   ("records", "records_pending")):
+                    metrics.queue_depth.set(stats[key], session=session_id, queue=queue)
+                if cdp:
+                    try:
+                        values = {m["name"]: m["value"] for m in (await cdp.send("Performance.getMetrics"))["metrics"]}
+                        metrics.browser_memory.set(values.get("JSHeapUsedSize", 0), session=session_id, kind="js_heap_used")
+                        metrics.browser_memory.set(values.get("JSHeapTotalSize", 0), session=session_id, kind="js_heap_total")
+                        metrics.browser_dom_nodes.set(values.get("Nodes", 0), session=session_id)
+                    except Exception as e:
+                        logger.debug(f"Could not sample browser memory: {e}")
+                await asyncio.sleep(metrics.sample_interval)
+        finally:
+            metrics.forget_session(session_id)
+
+    async def iter_query(self, name: str, max_results: Union[int, float] = float('inf'),
+                         with_details: bool = True, buffer: int = 0) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Search for a name and yield its records as they are extracted.
+
+        Args:
+            name: The name to search for.
+            max_results: Maximum records to scrape.
+            with_details: Whether to fetch each row's detail modal.
+            buffer: Number of finished records the crawl may keep ahead of the consumer.
+
+        Yields:
+            Scraped records.
+        """
+        if self.scraper.http:
+            for data in await self.query(name, max_results=max_results, with_details=with_details):
+                yield data
+            return
+
+        self.queries += 1
+        await self._prepare_search(name)
+        async for data in self.scraper.iter_records(max_results=max_results, with_details=with_details, buffer=buffer):
+            yield data
+
+    async def _prepare_search(self, name: str) -> None:
+        if not await self.scraper.portal_ready():
+            await self.scraper.handle_popups()
+            if not await self.scraper.portal_ready():
+                logger.info("Search form unavailable, reloading the portal...")
+                self.scraper.metrics.retries.inc(operation="portal_reload")
+                await self.scraper.open_portal()
+        await self.scraper.submit_search(name)
+
+    async def query(self, name: str, max_results: Union[int, float] = float('inf'),
+                    with_details: bool = True) -> List[Union[Dict[str, Any], Report]]:
+        """
+        Search for a name and extract its results.
+
+        Args:
+            name: The name to search for.
+            max_results: Maximum records to scrape.
+            with_details: Whether to fetch each row's detail modal.
+
+        Returns:
+            List of scraped records.
+        """
+        self.queries += 1
+        if self.http_client:
+            return self._typed(await self.http_client.query(name, max_results=max_results, with_details=with_details))
+
+        await self._prepare_search(name)
+
+        if not self.scraper.http:
+            return await self.scraper.extract_and_detail(max_results=max_results, with_details=with_details)
+
+        from lhkpn_http import PortalHTTPClient
+
+        http_session = await self.scraper.export_http_session()
+        http_kwargs = {"page_length": self.scraper.page_length} if isinstance(self.scraper.page_length, int) else {}
+        self.http_client = await self._stack.enter_async_context(
+            PortalHTTPClient(http_session, **http_kwargs, parser=self.scraper.parser, archive=self.scraper.archive,
+                             known_reports=self.scraper.known_reports, tracer=self.scraper.tracer,
+                             metrics=self.scraper.metrics, rate_limiter=self.scraper.rate_limiter))
+        return self._typed(await self.http_client.query(name, max_results=max_results, with_details=with_details))
+
+    def _typed(self, records: List[Dict[str, Any]]) -> List[Union[Dict[str, Any], Report]]:
+        if not self.scraper.typed:
+            return records
+        return [Report.from_dict(record) for record in records]
+
+
+class DetailWorkerPool:
+    """
+    A pool of extra pages in the scraper's browser context that fetch and parse
+    detail modals concurrently, fed by an asyncio queue of detail jobs.
+
+    Parsing is handed to the scraper's parse stage, so a worker moves on to its
+    next modal while the previous one is still being parsed.
+    """
+
+    def __init__(self, scraper: LHKPNScraper, size: int):
+        """
+        Initialize the pool.
+
+        Args:
+            scraper: The scraper whose browser context hosts the worker pages.
+            size: Number of worker pages.
+        """
+        self.scraper = scraper
+        self.size = size
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.pages: List[Page] = []
+        self.tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """
+        Open the worker pages and start their worker tasks.
+        """
+        logger.info(f"Starting {self.size} detail workers...")
+        for worker_id in range(self.size):
+            page = await self.scraper.context.new_page()
+            await Stealth().apply_stealth_async(page)
+            self.scraper.waits.watch(page)
+            self.pages.append(page)
+            self.tasks.append(asyncio.create_task(self._work(worker_id, page)))
+
+    def submit(self, query: str, page_index: int, row_index: int, label: str, key: Tuple[str, str, str]) -> asyncio.Future:
+        """
+        Queue a detail job.
+
+        Args:
+            query: The search query that produced the row.
+            page_index: Zero-based index of the table page holding the row.
+            row_index: Index of the row on that table page.
+            label: Human readable description of the row, used for logging.
+            key: Natural key of the row's record. The worker only opens the
+                modal if its own row at that position has the same key, since
+                the result order can shift between searches.
+
+        Returns:
+            A future resolving to the parsed details, or None if they could not be fetched.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((query, page_index, row_index, label, key, future))
+        return future
+
+    async def _row_key(self, page: Page, row_index: int) -> Optional[Tuple[str, str, str]]:
+        rows = await self.scraper.harvest_rows(page)
+        if row_index >= len(rows):
+            return None
+        return natural_key(self.scraper.build_record(rows[row_index]["cells"]))
+
+    async def _work(self, worker_id: int, page: Page) -> None:
+        current_query = None
+        current_index = 0
+        while True:
+            query, page_index, row_index, label, key, future = await self.queue.get()
+            try:
+                for attempt in range(2):
+                    if query != current_query:
+                        if current_query is None or not await self.scraper.portal_ready(page):
+                            await self.scraper.open_portal(page)
+                        await self.scraper.submit_search(query, page)
+                        current_query, current_index = query, 0
+                    if page_index != current_index:
+                        if not await self.scraper.goto_table_page(page, page_index, current_index):
+                            raise RuntimeError(f"could not reach table page {page_index + 1}")
+                        current_index = page_index
+                    if await self._row_key(page, row_index) == key:
                         break
-                
-                if found_index and desc and val:
-                    data[current_cat].append({
-                        "description": desc,
-                        "value": val
-                    })
-
-        # Fallback for totals if no detailed list items were found
-        for key in data:
-            if not data[key]:
-                cat_name_search = [k for k, v in category_map.items() if v == key][0]
-                for row in rows:
-                    row_text = row.get_text(" ", strip=True).upper()
-                    if cat_name_search in row_text:
-                        cells = row.find_all(["td", "th"])
-                        for cell in cells:
-                            cell_text = cell.get_text(strip=True)
-                            if cell_text and any(c.isdigit() for c in cell_text) and cell_text.replace(".", "").replace(",", "").isdigit():
-                                data[key].append({"description": "Total", "value": cell_text})
-                                break
-                            
-        return data
+                    if attempt:
+                        raise RuntimeError("the row no longer holds this report")
+                    # The results shifted since this worker's search, e.g. a new filing: search again once.
+                    logger.warning(f"Detail worker {worker_id} found another report at the row of {label}, re-searching...")
+                    self.scraper.metrics.retries.inc(operation="detail_row_mismatch")
+                    current_query = None
+
+                modal_html = await self.scraper.fetch_detail(page, row_index, label)
+                if modal_html is None:
+                    future.set_result(None)
+                else:
+                    self.scraper.parse_details(modal_html).add_done_callback(
+                        lambda parsed, future=future, label=label: self._resolve(future, parsed, label))
+            except Exception as e:
+                logger.error(f"Detail worker {worker_id} failed for {label}: {e}")
+                self.scraper.metrics.modal_failures.inc()
+                # Start over from a fresh search on the next job.
+                current_query = None
+                if not future.done():
+                    future.set_result(None)
+            finally:
+                self.queue.task_done()
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, parsed: asyncio.Task, label: str) -> None:
+        if future.done():
+            return
+        if parsed.cancelled() or parsed.exception():
+            logger.error(f"Parsing detail failed for {label}: {'cancelled' if parsed.cancelled() else parsed.exception()}")
+            future.set_result(None)
+        else:
+            future.set_result(parsed.result())
+
+    async def close(self) -> None:
+        """
+        Stop the worker tasks and close their pages.
+        """
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        for page in self.pages:
+            await page.close()
@@ -0,0 +1,230 @@
+import logging
+import os
+import sqlite3
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Iterator, Optional, Set, Tuple, Union
+
+from lhkpn_archive import ARCHIVE_KEY, read_records
+from lhkpn_models import ASSET_FIELDS, Report, natural_key, parse_rupiah, to_record
+
+logger = logging.getLogger("LHKPNScraper")
+
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    tanggal_lapor TEXT NOT NULL,
+    jenis_laporan TEXT NOT NULL,
+    name_key TEXT NOT NULL,
+    jenis_key TEXT NOT NULL,
+    lembaga TEXT,
+    unit_kerja TEXT,
+    jabatan TEXT,
+    total_harta INTEGER,
+    query TEXT,
+    modal_sha256 TEXT,
+    scraped_at TEXT NOT NULL,
+    UNIQUE (name_key, tanggal_lapor, jenis_key)
+);
+-- name_key and jenis_key hold the normalized natural key; name and
+-- jenis_laporan keep the text as the portal shows it. The natural key's
+-- unique index also serves lookups by name.
+CREATE INDEX IF NOT EXISTS reports_lembaga ON reports (lembaga);
+CREATE INDEX IF NOT EXISTS reports_tanggal_lapor ON reports (tanggal_lapor);
+CREATE INDEX IF NOT EXISTS reports_total_harta ON reports (total_harta);
+
+CREATE TABLE IF NOT EXISTS assets (
+    report_id INTEGER NOT NULL REFERENCES reports (id) ON DELETE CASCADE,
+    category TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    description TEXT,
+    value INTEGER,
+    PRIMARY KEY (report_id, category, line)
+) WITHOUT ROWID;
+"""
+
+UPSERT_REPORT = """
+INSERT INTO reports (name, tanggal_lapor, jenis_laporan, name_key, jenis_key, lembaga, unit_kerja, jabatan, total_harta,
+                     query, modal_sha256, scraped_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (name_key, tanggal_lapor, jenis_key) DO UPDATE SET
+    name = excluded.name,
+    jenis_laporan = excluded.jenis_laporan,
+    lembaga = excluded.lembaga,
+    unit_kerja = excluded.unit_kerja,
+    jabatan = excluded.jabatan,
+    total_harta = excluded.total_harta,
+    query = COALESCE(excluded.query, reports.query),
+    modal_sha256 = COALESCE(excluded.modal_sha256, reports.modal_sha256),
+    scraped_at = excluded.scraped_at
+RETURNING id
+"""
+
+
+class SQLiteStore:
+    """
+    Stores reports and their asset lines in a local SQLite database.
+
+    Reports are keyed by their normalized natural key (name, tanggal_lapor,
+    jenis_laporan), so re-crawling a report updates it instead of adding a
+    duplicate. The name and report type are stored as scraped. Writes are
+    buffered and committed in batches; the database runs in WAL mode so it can
+    be queried while a crawl is writing to it.
+    """
+
+    def __init__(self, path: str, batch_size: int = 500):
+        """
+        Initialize the store.
+
+        Args:
+            path: Path of the SQLite database. Created if missing.
+            batch_size: Number of records written per transaction.
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.count = 0
+        self.conn: Optional[sqlite3.Connection] = None
+        self._buffer: List[Dict[str, Any]] = []
+
+    def __enter__(self) -> "SQLiteStore":
+        self.open()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def open(self) -> None:
+        """
+        Open the database and create its tables and indexes if needed.
+        """
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+
+    def write(self, record: Union[Dict[str, Any], Report]) -> None:
+        """
+        Buffer one record, committing the buffer once it holds `batch_size` records.
+        """
+        self._buffer.append(to_record(record))
+        self.count += 1
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Upsert the buffered records in a single transaction.
+
+        A record without any asset lines, e.g. from a crawl without details,
+        keeps the asset lines already stored for its report.
+        """
+        records, self._buffer = self._buffer, []
+        if not records:
+            return
+        scraped_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        with self.conn:
+            for record in records:
+                name_key, tanggal_lapor, jenis_key = natural_key(record)
+                (report_id,) = self.conn.execute(UPSERT_REPORT, (
+                    (record.get("name") or "").strip(), tanggal_lapor, (record.get("jenis_laporan") or "").strip(),
+                    name_key, jenis_key,
+                    record.get("lembaga"), record.get("unit_kerja"), record.get("jabatan"),
+                    parse_rupiah(record.get("total_harta")),
+                    record.get("query"), record.get(ARCHIVE_KEY), scraped_at,
+                )).fetchone()
+
+                lines = [(report_id, category, line_no, line.get("description"), parse_rupiah(line.get("value")))
+                         for category in ASSET_FIELDS
+                         for line_no, line in enumerate(record.get(category) or [])]
+                if lines:
+                    self.conn.execute("DELETE FROM assets WHERE report_id = ?", (report_id,))
+                    self.conn.executemany("INSERT INTO assets VALUES (?, ?, ?, ?, ?)", lines)
+
+    def close(self) -> None:
+        """
+        Commit any buffered records and close the database.
+        """
+        if self.conn is None:
+            return
+        self.flush()
+        self.conn.close()
+        self.conn = None
+
+    def _report(self, row: sqlite3.Row) -> Dict[str, Any]:
+        record = {key: row[key] for key in ("name", "lembaga", "unit_kerja", "jabatan", "tanggal_lapor",
+                                            "jenis_laporan", "total_harta")}
+        for category in ASSET_FIELDS:
+            record[category] = []
+        for category, description, value in self.conn.execute(
+                "SELECT category, description, value FROM assets WHERE report_id = ? ORDER BY category, line",
+                (row["id"],)):
+            record[category].append({"description": description, "value": value})
+        for key in ("query", ARCHIVE_KEY):
+            if row[key] is not None:
+                record[key] = row[key]
+        return record
+
+    def _select(self, where: str, params: Tuple) -> Iterator[Dict[str, Any]]:
+        self.flush()
+        cursor = self.conn.execute(f"SELECT * FROM reports WHERE {where} ORDER BY tanggal_lapor", params)
+        cursor.row_factory = sqlite3.Row
+        for row in cursor:
+            yield self._report(row)
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[Dict[str, Any]]:
+        """
+        Look up a report by its natural key, as returned by `natural_key`.
+
+        Returns:
+            The stored record with integer amounts and an ISO date, or None.
+        """
+        return next(self._select("name_key = ? AND tanggal_lapor = ? AND jenis_key = ?", key), None)
+
+    def by_name(self, name: str) -> List[Dict[str, Any]]:
+        """
+        Return every stored report of an official, oldest first.
+        """
+        return list(self._select("name_key = ?", (name.strip().upper(),)))
+
+    def __contains__(self, record: Union[Dict[str, Any], Report, Tuple[str, str, str]]) -> bool:
+        key = record if isinstance(record, tuple) else natural_key(record)
+        self.flush()
+        return self.conn.execute("SELECT 1 FROM reports WHERE name_key = ? AND tanggal_lapor = ? AND jenis_key = ?",
+                                 key).fetchone() is not None
+
+    def keys(self) -> Iterator[Tuple[str, str, str]]:
+        """
+        Iterate over the natural keys of all stored reports.
+        """
+        self.flush()
+        yield from self.conn.execute("SELECT name_key, tanggal_lapor, jenis_key FROM reports")
+
+    def __len__(self) -> int:
+        self.flush()
+        return self.conn.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+
+
+def load_known_reports(path: str) -> Set[Tuple[str, str, str]]:
+    """
+    Load the natural keys of the reports already fetched, for an incremental crawl.
+
+    Args:
+        path: A SQLite store (.db, .sqlite, .sqlite3) or a JSON/JSON Lines
+            results file. A missing file means nothing is known yet.
+
+    Returns:
+        The set of known natural keys.
+    """
+    if not os.path.exists(path):
+        logger.info(f"No known reports at {path}, every report will be fetched.")
+        return set()
+    if path.endswith(SQLITE_SUFFIXES):
+        with SQLiteStore(path) as store:
+            known = set(store.keys())
+    else:
+        known = {natural_key(record) for record in read_records(path)}
+    logger.info(f"Loaded {len(known)} known reports from {path}.")
+    return known
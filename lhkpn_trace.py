@@ -0,0 +1,164 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, List, Dict, Any, IO, Iterator, Optional
+
+logger = logging.getLogger("LHKPNScraper")
+
+_current_span: ContextVar[Optional[str]] = ContextVar("lhkpn_current_span", default=None)
+
+
+def _new_id(size: int) -> str:
+    return os.urandom(size).hex()
+
+
+class Tracer:
+    """
+    Records timing spans around the stages of a crawl and summarizes where the time went.
+
+    Spans nest through a context variable, so a span opened inside another one,
+    also in a task started from it, records it as its parent. With a `path`,
+    every finished span is written as one JSON line using OpenTelemetry span
+    field names (traceId, spanId, parentSpanId, startTimeUnixNano, ...), which
+    trace viewers and log pipelines can ingest.
+    """
+
+    def __init__(self, path: Optional[str] = None, log_spans: bool = False):
+        """
+        Initialize the tracer.
+
+        Args:
+            path: File to write spans to as JSON Lines. Spans are only aggregated if omitted.
+            log_spans: Whether to also log every span as JSON at DEBUG level.
+        """
+        self.path = path
+        self.log_spans = log_spans
+        self.trace_id = _new_id(16)
+        self.started = time.perf_counter()
+        self._durations: Dict[str, List[float]] = defaultdict(list)
+        self._errors: Dict[str, int] = defaultdict(int)
+        self._listeners: List[Callable[[str, float, bool], None]] = []
+        self._lock = threading.Lock()
+        self._file: Optional[IO[str]] = open(path, "a", encoding="utf-8") if path else None
+
+    def add_listener(self, listener: Callable[[str, float, bool], None]) -> None:
+        """
+        Call `listener(name, seconds, failed)` for every finished span, e.g. `Metrics.observe_span`.
+
+        Adding the same listener twice has no effect.
+        """
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Time the enclosed block as a span.
+
+        Args:
+            name: Stage name, e.g. "harvest_rows" or "modal_open".
+            **attributes: Values to attach to the span. More can be added to
+                the yielded dictionary inside the block.
+
+        Yields:
+            The span's attribute dictionary.
+        """
+        span_id = _new_id(8)
+        parent_id = _current_span.get()
+        token = _current_span.set(span_id)
+        start_ns = time.time_ns()
+        start = time.perf_counter()
+        error = None
+        try:
+            yield attributes
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            _current_span.reset(token)
+            self._finish(name, span_id, parent_id, start_ns, duration_ms, attributes, error)
+
+    def _finish(self, name: str, span_id: str, parent_id: Optional[str], start_ns: int, duration_ms: float,
+                attributes: Dict[str, Any], error: Optional[str]) -> None:
+        with self._lock:
+            self._durations[name].append(duration_ms)
+            if error:
+                self._errors[name] += 1
+        for listener in self._listeners:
+            listener(name, duration_ms / 1000, error is not None)
+        if not (self._file or self.log_spans):
+            return
+
+        record = {
+            "traceId": self.trace_id,
+            "spanId": span_id,
+            "parentSpanId": parent_id or "",
+            "name": name,
+            "startTimeUnixNano": start_ns,
+            "endTimeUnixNano": start_ns + int(duration_ms * 1e6),
+            "durationMs": round(duration_ms, 3),
+            "attributes": {k: v if isinstance(v, (str, int, float, bool)) else str(v) for k, v in attributes.items()},
+            "status": {"code": "ERROR", "message": error} if error else {"code": "OK"},
+        }
+        line = json.dumps(record)
+        if self.log_spans:
+            logger.debug(line)
+        if self._file:
+            with self._lock:
+                self._file.write(line + "\n")
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Summarize the spans recorded so far.
+
+        Returns:
+            Wall-clock seconds since the tracer started and, per span name, the
+            count, errors, total/mean/p50/p95/max milliseconds and the share of
+            wall-clock time. Shares of nested or concurrent spans overlap.
+        """
+        wall = time.perf_counter() - self.started
+        stages = {}
+        with self._lock:
+            items = [(name, sorted(durations)) for name, durations in self._durations.items()]
+        for name, durations in sorted(items, key=lambda item: -sum(item[1])):
+            total = sum(durations)
+            stages[name] = {
+                "count": len(durations),
+                "errors": self._errors.get(name, 0),
+                "total_ms": round(total, 1),
+                "mean_ms": round(total / len(durations), 1),
+                "p50_ms": round(durations[len(durations) // 2], 1),
+                "p95_ms": round(durations[min(len(durations) - 1, int(len(durations) * 0.95))], 1),
+                "max_ms": round(durations[-1], 1),
+                "share": round(total / 1000 / wall, 3) if wall else 0.0,
+            }
+        return {"wall_seconds": round(wall, 2), "stages": stages}
+
+    def log_summary(self) -> None:
+        """
+        Log the summary as a table of stages, slowest total first.
+        """
+        summary = self.summary()
+        if not summary["stages"]:
+            return
+        lines = [f"Time by stage over {summary['wall_seconds']}s:"]
+        for name, stage in summary["stages"].items():
+            errors = f" errors={stage['errors']}" if stage["errors"] else ""
+            lines.append(f"  {name:<18} n={stage['count']:<6} total={stage['total_ms'] / 1000:>8.2f}s "
+                         f"mean={stage['mean_ms']:>8.1f}ms p95={stage['p95_ms']:>8.1f}ms "
+                         f"{stage['share']:>6.1%}{errors}")
+        logger.info("\n".join(lines))
+
+    def close(self) -> None:
+        """
+        Close the trace file.
+        """
+        if self._file:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,180 @@
+import asyncio
+import logging
+import time
+import weakref
+
+from playwright.async_api import Page
+
+logger = logging.getLogger("LHKPNScraper")
+
+TABLE_SELECTOR = "#table-pengumuman"
+MODAL_SELECTOR = "#modal-perbandingan-announcement-lhkpn"
+
+ARM_DRAW_JS = """(selector) => {
+    window.__lhkpnDrawn = false;
+    const $ = window.jQuery;
+    if (!($ && $.fn.dataTable && $.fn.dataTable.isDataTable(selector))) return false;
+    $(selector).one('draw.dt', () => { window.__lhkpnDrawn = true; });
+    return true;
+}"""
+
+ARM_MODAL_JS = """(selector) => {
+    window.__lhkpnModal = null;
+    const $ = window.jQuery;
+    if (!$) return false;
+    $(document).off('.lhkpn');
+    $(document).on('opened.lhkpn shown.bs.modal.lhkpn', selector, () => { window.__lhkpnModal = 'opened'; });
+    $(document).on('closed.lhkpn hidden.bs.modal.lhkpn', selector, () => { window.__lhkpnModal = 'closed'; });
+    return true;
+}"""
+
+ACTIVE_MODALS_SELECTOR = ".remodal-is-opened, .modal.in, .modal.show"
+
+
+class WaitStrategy:
+    """
+    Event-driven waits for the portal's DataTables and modals.
+
+    Every wait is bounded by a timeout and reports whether the awaited state was
+    reached instead of raising, so callers can fall through to their own checks.
+    """
+
+    def __init__(self, timeout: float = 10.0, idle_timeout: float = 3.0):
+        """
+        Initialize the wait strategy.
+
+        Args:
+            timeout: Seconds to wait for table draws and modal transitions.
+            idle_timeout: Seconds to wait for the network to go idle.
+        """
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self._inflight = weakref.WeakKeyDictionary()
+
+    def watch(self, page: Page) -> None:
+        """
+        Track in-flight requests of a page so `network_idle` also covers XHRs after the initial load.
+        """
+        if page in self._inflight:
+            return
+        self._inflight[page] = 0
+
+        def started(_request):
+            self._inflight[page] += 1
+
+        def finished(_request):
+            self._inflight[page] = max(0, self._inflight[page] - 1)
+
+        page.on("request", started)
+        page.on("requestfinished", finished)
+        page.on("requestfailed", finished)
+
+    async def _wait_for_function(self, page: Page, expression: str, arg=None, timeout: float = None) -> bool:
+        try:
+            await page.wait_for_function(expression, arg=arg, timeout=(timeout or self.timeout) * 1000)
+            return True
+        except Exception as e:
+            logger.debug(f"Wait for {expression!r} ended without success: {e}")
+            return False
+
+    async def _wait_for_selector(self, page: Page, selector: str, state: str, timeout: float = None) -> bool:
+        try:
+            await page.wait_for_selector(selector, state=state, timeout=(timeout or self.timeout) * 1000)
+            return True
+        except Exception as e:
+            logger.debug(f"Wait for {selector} to be {state} ended without success: {e}")
+            return False
+
+    async def arm_table_draw(self, page: Page, table: str = TABLE_SELECTOR) -> bool:
+        """
+        Listen for the next DataTables `draw` event. Call before triggering the redraw.
+
+        Returns:
+            True if the table is a DataTable and the listener was installed.
+        """
+        return await page.evaluate(ARM_DRAW_JS, table)
+
+    async def table_drawn(self, page: Page, armed: bool = True, table: str = TABLE_SELECTOR) -> bool:
+        """
+        Wait for the redraw announced by `arm_table_draw`, then for the processing indicator to go away.
+
+        Args:
+            page: The page holding the table.
+            armed: Result of `arm_table_draw`. Without a listener only the
+                processing indicator and network idle are awaited.
+            table: CSS selector of the table.
+
+        Returns:
+            True if the draw event was observed.
+        """
+        drawn = False
+        if armed:
+            drawn = await self._wait_for_function(page, "() => window.__lhkpnDrawn === true")
+        else:
+            await self.network_idle(page)
+        await self.processing_done(page, table)
+        return drawn
+
+    async def processing_done(self, page: Page, table: str = TABLE_SELECTOR) -> bool:
+        """
+        Wait for the DataTables "processing" indicator to disappear.
+        """
+        return await self._wait_for_selector(page, f"{table}_processing", state="hidden")
+
+    async def arm_modal(self, page: Page, modal: str = MODAL_SELECTOR) -> bool:
+        """
+        Listen for remodal/bootstrap open and close events of a modal. Call before opening it.
+
+        Returns:
+            True if the listeners were installed.
+        """
+        return await page.evaluate(ARM_MODAL_JS, modal)
+
+    async def modal_opened(self, page: Page, armed: bool = True, modal: str = MODAL_SELECTOR) -> bool:
+        """
+        Wait for a modal to finish opening.
+        """
+        if armed:
+            return await self._wait_for_function(page, "() => window.__lhkpnModal === 'opened'")
+        return await self._wait_for_selector(page, modal, state="visible")
+
+    async def modal_closed(self, page: Page, armed: bool = True, modal: str = MODAL_SELECTOR) -> bool:
+        """
+        Wait for a modal to finish closing.
+        """
+        if armed and await self._wait_for_function(page, "() => window.__lhkpnModal === 'closed'"):
+            return True
+        return await self._wait_for_selector(page, modal, state="hidden")
+
+    async def popups_closed(self, page: Page, timeout: float = 1.0) -> bool:
+        """
+        Wait until no remodal or bootstrap modal is open.
+        """
+        return await self._wait_for_function(
+            page, "(selector) => !document.querySelector(selector)", arg=ACTIVE_MODALS_SELECTOR, timeout=timeout)
+
+    async def network_idle(self, page: Page, timeout: float = None, quiet: float = 0.25) -> bool:
+        """
+        Wait for the page to have no requests in flight for `quiet` seconds.
+        """
+        timeout = timeout or self.idle_timeout
+        if page not in self._inflight:
+            try:
+                await page.wait_for_load_state("networkidle", timeout=timeout * 1000)
+                return True
+            except Exception as e:
+                logger.debug(f"Network did not go idle: {e}")
+                return False
+
+        deadline = time.monotonic() + timeout
+        idle_since = None
+        while time.monotonic() < deadline:
+            if self._inflight[page] == 0:
+                idle_since = idle_since or time.monotonic()
+                if time.monotonic() - idle_since >= quiet:
+                    return True
+            else:
+                idle_since = None
+            await asyncio.sleep(0.05)
+        logger.debug("Network did not go idle before the timeout.")
+        return False
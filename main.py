@@ -2,8 +2,20 @@ import asyncio
 import json
 import argparse
 import logging
+import os
+import sys
 import pandas as pd
-from lhkpn_scraper import LHKPNScraper
+from lhkpn_archive import ModalArchive, read_records, reparse_records
+from lhkpn_batch import BatchRunner, read_names
+from lhkpn_checkpoint import Checkpoint
+from lhkpn_metrics import Metrics, MetricsServer
+from lhkpn_models import to_record
+from lhkpn_ratelimit import AdaptiveRateLimiter
+from lhkpn_output import ColumnarWriter, JSONLWriter
+from lhkpn_parse import check_backend
+from lhkpn_scraper import LHKPNScraper, LHKPNSession
+from lhkpn_store import SQLiteStore, load_known_reports
+from lhkpn_trace import Tracer
 
 def parse_max_results(value):
     """Parse max-results argument, allowing 'inf' for infinity."""
@@ -14,6 +26,15 @@ def parse_max_results(value):
     except ValueError:
         raise argparse.ArgumentTypeError(f"invalid int value: '{value}'")
 
+def parse_page_length(value):
+    """Parse page-length argument, allowing 'max' for the largest length the portal offers."""
+    if value.lower() == 'max':
+        return 'max'
+    try:
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{value}'")
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -21,38 +42,238 @@ logging.basicConfig(
 )
 logger = logging.getLogger("LHKPN_CLI")
 
+STREAMING_FORMATS = ("jsonl", "parquet", "arrow", "sqlite")
+
+def open_writer(output, fmt, append=False):
+    """Open a writer that streams records to disk as jsonl, as parquet/arrow reports and assets tables, or into a SQLite store."""
+    if fmt == "jsonl":
+        return JSONLWriter(output, append=append)
+    if fmt == "sqlite":
+        return SQLiteStore(output)
+    return ColumnarWriter(output, fmt)
+
+def write_records(data, output, fmt):
+    """Write a list of records as json, jsonl, csv, parquet, arrow or into a SQLite store."""
+    if fmt in STREAMING_FORMATS:
+        with open_writer(output, fmt) as writer:
+            for record in data:
+                writer.write(record)
+        return
+    data = [to_record(record) for record in data]
+    if fmt == "csv":
+        # Flatten data for CSV if needed, or just focus on the main fields
+        df = pd.DataFrame(data)
+        # Reorder columns to put basic info first
+        cols = ["name", "lembaga", "unit_kerja", "jabatan", "tanggal_lapor", "jenis_laporan", "total_harta"]
+        other_cols = [c for c in df.columns if c not in cols]
+        df = df[cols + other_cols]
+        df.to_csv(output, index=False)
+    else:
+        with open(output, "w") as f:
+            json.dump(data, f, indent=4)
+
+def same_file(a, b):
+    """Whether two paths name the same file, whether or not it exists yet."""
+    return bool(a and b) and os.path.realpath(a) == os.path.realpath(b)
+
+def run_reparse(args):
+    """Re-parse the archived modals of a results file and write the updated records."""
+    if not args.archive_dir:
+        raise SystemExit("--reparse requires --archive-dir")
+    try:
+        check_backend(args.parser_backend)
+    except ImportError as e:
+        raise SystemExit(str(e))
+    archive = ModalArchive(args.archive_dir)
+    records = reparse_records(read_records(args.reparse), archive, backend=args.parser_backend, processes=args.processes)
+    logger.info(f"Re-parsing {args.reparse} from archive {args.archive_dir}...")
+
+    # Records are read lazily, so regenerating a file in place writes a temporary file and swaps it in.
+    in_place = same_file(args.output, args.reparse)
+    output = f"{args.output}.{os.getpid()}.tmp" if in_place else args.output
+    try:
+        if args.format in STREAMING_FORMATS:
+            with open_writer(output, args.format) as writer:
+                for record in records:
+                    writer.write(record)
+            count = writer.count
+        else:
+            data = list(records)
+            write_records(data, output, args.format)
+            count = len(data)
+        if in_place:
+            os.replace(output, args.output)
+    finally:
+        if in_place and os.path.exists(output):
+            os.remove(output)
+    logger.info(f"Re-parsed {count} records. Saved to {args.output}")
+
+async def run_batch(args, scraper_kwargs, append=False):
+    """Run every name of a batch file and stream each finished query's records to the output."""
+    if args.batch == "-":
+        names = read_names(sys.stdin)
+    else:
+        with open(args.batch) as f:
+            names = read_names(f)
+    logger.info(f"Starting batch of {len(names)} queries (concurrency: {args.concurrency}, rate: {args.rate or 'unlimited'})...")
+
+    runner = BatchRunner(concurrency=args.concurrency, rate=args.rate, max_results=args.max_results,
+                         with_details=args.details, **scraper_kwargs)
+    tracer = scraper_kwargs["tracer"]
+    with open_writer(args.output, args.format if args.format in STREAMING_FORMATS else "jsonl", append) as writer:
+        async for result in runner.run(names):
+            with tracer.span("output", records=len(result["records"])):
+                for record in result["records"]:
+                    writer.write(dict(to_record(record), query=result["query"]))
+
+    if runner.failed:
+        failed_path = f"{args.output}.failed"
+        with open(failed_path, "w") as f:
+            f.writelines(name + "\n" for name in runner.failed)
+        logger.warning(f"{len(runner.failed)} queries failed or were not run; their names were saved to {failed_path}")
+    logger.info(f"Saved {runner.records} records to {args.output}")
+
 async def main():
     parser = argparse.ArgumentParser(description="Scrape LHKPN data from KPK portal.")
-    parser.add_argument("query", help="The name or query to search for.")
+    parser.add_argument("query", nargs="?", help="The name or query to search for.")
+    parser.add_argument("--batch", type=str, default=None, help="Read names to search for from this file, one per line ('-' for stdin). Results are written as JSON Lines, or as parquet/arrow tables or a SQLite store with --format.")
+    parser.add_argument("--concurrency", type=int, default=2, help="Number of browser contexts running batch queries at once (default: 2).")
+    parser.add_argument("--rate", type=float, default=None, help="Maximum batch queries started per second across all contexts (default: unlimited).")
     parser.add_argument("--max-results", type=parse_max_results, default=10, help="Maximum number of results to scrape (default: 10). Use 'inf' for unlimited results.")
     parser.add_argument("--headless", action="store_true", default=True, help="Run browser in headless mode (default: True).")
     parser.add_argument("--no-headless", action="store_false", dest="headless", help="Run browser in capped (visible) mode.")
     parser.add_argument("--output", type=str, default="lhkpn_results.json", help="Output file path (default: lhkpn_results.json).")
-    parser.add_argument("--format", choices=["json", "csv"], default="json", help="Output format: json or csv (default: json).")
+    parser.add_argument("--format", choices=["json", "jsonl", "csv", "parquet", "arrow", "sqlite"], default="json", help="Output format: json, jsonl (streamed, one record per line), csv, parquet/arrow (a reports table plus a long-format <output>.assets table; needs pyarrow), or sqlite (upserts into the database at --output) (default: json).")
+    parser.add_argument("--no-details", action="store_false", dest="details", help="Only scrape the results table, without opening detail modals.")
+    parser.add_argument("--detail-mode", choices=["dom", "network"], default="dom", help="Read detail modals from the rendered DOM or from the XHR that loads them (default: dom).")
+    parser.add_argument("--wait-timeout", type=float, default=10.0, help="Seconds to wait for table redraws and modal transitions (default: 10).")
+    parser.add_argument("--page-length", type=parse_page_length, default=None, help="Rows per results page to request from the portal, or 'max' for the largest it offers (default: portal default).")
+    parser.add_argument("--block-resources", action="store_true", help="Abort images, fonts, stylesheets, media and third-party requests to save bandwidth.")
+    parser.add_argument("--allow-host", action="append", dest="allowed_hosts", default=None, help="Extra host the browser may contact when --block-resources is set, besides the portal host (repeatable).")
+    parser.add_argument("--http", action="store_true", help="Use the browser only to establish the portal session, then fetch results over plain HTTP (requires httpx).")
+    parser.add_argument("--parser", choices=["bs4", "lxml"], default="bs4", dest="parser_backend", help="HTML parser for detail modals; lxml is faster and needs the 'fast' extra (default: bs4).")
+    parser.add_argument("--parse-executor", choices=["inline", "thread", "process"], default="inline", help="Parse detail modals on the event loop, or in a thread or process pool so parsing overlaps with fetching (default: inline).")
+    parser.add_argument("--parse-workers", type=int, default=None, help="Size of the parse pool for --parse-executor thread/process (default: executor default).")
+    parser.add_argument("--typed", action="store_true", help="Store amounts as integer Rupiah and tanggal_lapor as an ISO date instead of the portal's strings.")
+    parser.add_argument("--incremental", type=str, default=None, metavar="KNOWN", help="Skip reports already in this SQLite store or json/jsonl results file without opening their modal; only new reports are written. An --output that is also KNOWN keeps its reports: jsonl is appended to, sqlite updated and json rewritten with the new reports added.")
+    parser.add_argument("--checkpoint", type=str, default=None, help="Save crawl progress to this file (default with --resume: <output>.checkpoint). Browser crawls only, not --http or --batch.")
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted crawl from its checkpoint, appending to the output (needs --format jsonl or sqlite).")
+    parser.add_argument("--base-url", type=str, default=None, help="Portal root to scrape instead of https://elhkpn.kpk.go.id, e.g. a local mock started with `python lhkpn_mock.py`.")
+    parser.add_argument("--trace", type=str, default=None, metavar="FILE", help="Write timing spans of every stage (browser launch, page load, popups, row harvest, modals, parsing, pagination, output) to this file as JSON Lines with OpenTelemetry field names. A summary of where time went is logged either way.")
+    parser.add_argument("--portal-rate", type=float, default=None, help="Pace portal page loads and XHRs across all pages and contexts, starting at this many requests per second and adapting to response times and HTTP 429/5xx responses (default: unpaced).")
+    parser.add_argument("--portal-max-rate", type=float, default=10.0, help="Highest requests per second --portal-rate may speed up to (default: 10).")
+    parser.add_argument("--target-latency", type=float, default=1.5, help="Seconds to first byte above which --portal-rate backs off (default: 1.5).")
+    parser.add_argument("--metrics-port", type=int, default=None, help="Serve Prometheus metrics (records, modals opened and failed, page transitions, retries, stage durations, queue depths, browser memory) at http://127.0.0.1:PORT/metrics while the crawl runs.")
+    parser.add_argument("--archive-dir", type=str, default=None, help="Archive raw modal HTML (gzip, content-addressed) in this directory for later re-parsing.")
+    parser.add_argument("--reparse", type=str, default=None, metavar="RESULTS", help="Re-parse the archived modals of a results file (json or jsonl) instead of scraping; needs --archive-dir.")
+    parser.add_argument("--processes", type=int, default=None, help="Worker processes for --reparse (default: number of CPUs).")
+    parser.add_argument("--detail-workers", type=int, default=1, help="Number of browser pages fetching detail modals concurrently (default: 1).")
 
     args = parser.parse_args()
+    if args.reparse:
+        run_reparse(args)
+        return
+    if not args.query and not args.batch:
+        parser.error("a query, --batch or --reparse is required")
+    try:
+        check_backend(args.parser_backend)
+    except ImportError as e:
+        parser.error(str(e))
+    if (args.resume or args.checkpoint) and args.batch:
+        parser.error("--checkpoint and --resume apply to single-query crawls")
+    if (args.resume or args.checkpoint) and args.http:
+        parser.error("--checkpoint and --resume apply to browser crawls, not --http")
+    if same_file(args.incremental, args.output) and (args.format not in ("json", "jsonl", "sqlite")
+                                                     or (args.batch and args.format == "json")):
+        # Anything else would overwrite or corrupt the known reports, so the next run would fetch them all again.
+        parser.error("an --output that is also the --incremental file needs --format jsonl or sqlite "
+                     "(or json for a single query)")
+    if args.resume and args.format not in ("jsonl", "sqlite"):
+        parser.error("--resume needs --format jsonl or sqlite to keep the records written before the interruption")
+    checkpoint = None
+    if args.resume or args.checkpoint:
+        checkpoint_path = args.checkpoint or f"{args.output}.checkpoint"
+        checkpoint = Checkpoint.load(checkpoint_path) if args.resume else Checkpoint(checkpoint_path)
+
+    scraper_kwargs = dict(
+        headless=args.headless,
+        detail_workers=args.detail_workers,
+        detail_mode=args.detail_mode,
+        http=args.http,
+        wait_timeout=args.wait_timeout,
+        page_length=args.page_length,
+        block_resources=args.block_resources,
+        allowed_hosts=args.allowed_hosts,
+        parser_backend=args.parser_backend,
+        archive_dir=args.archive_dir,
+        parse_executor=args.parse_executor,
+        parse_workers=args.parse_workers,
+        typed=args.typed,
+        known_reports=load_known_reports(args.incremental) if args.incremental else None,
+        base_url=args.base_url,
+        tracer=Tracer(args.trace),
+        metrics=Metrics(),
+        rate_limiter=AdaptiveRateLimiter(args.portal_rate, max_rate=max(args.portal_rate, args.portal_max_rate),
+                                         target_latency=args.target_latency) if args.portal_rate else None,
+    )
+    server = MetricsServer(scraper_kwargs["metrics"], args.metrics_port).start() if args.metrics_port is not None else None
+    try:
+        await run_scrape(args, scraper_kwargs, checkpoint)
+    finally:
+        if server:
+            server.stop()
+        tracer = scraper_kwargs["tracer"]
+        tracer.log_summary()
+        tracer.close()
+        if args.trace:
+            logger.info(f"Trace spans saved to {args.trace}")
 
-    scraper = LHKPNScraper(headless=args.headless)
+async def run_scrape(args, scraper_kwargs, checkpoint=None):
+    """Run a single query or a batch and write its records."""
+    # Appending keeps the known reports when the output is also the manifest,
+    # and the records written before the interruption when resuming.
+    manifest_output = same_file(args.incremental, args.output)
+    append = args.resume or manifest_output
+
+    if args.batch:
+        await run_batch(args, scraper_kwargs, append)
+        return
+
+    if checkpoint and checkpoint.done(args.query):
+        logger.info(f"Checkpoint {checkpoint.path} records a finished crawl of '{args.query}', nothing to resume.")
+        return
+
+    scraper = LHKPNScraper(checkpoint=checkpoint, **scraper_kwargs)
     logger.info(f"Starting scrape for '{args.query}' (max results: {args.max_results})...")
     
     try:
-        data = await scraper.run(args.query, max_results=args.max_results)
+        if args.format in STREAMING_FORMATS:
+            async with LHKPNSession(scraper) as session:
+                with open_writer(args.output, args.format, append) as writer:
+                    async for record in session.iter_query(args.query, max_results=args.max_results,
+                                                           with_details=args.details):
+                        with scraper.tracer.span("output"):
+                            writer.write(record)
+            if not writer.count:
+                logger.warning("No data found for the given query.")
+            else:
+                logger.info(f"Successfully scraped {writer.count} records. Saved to {args.output}")
+            return
+
+        async with LHKPNSession(scraper) as session:
+            data = [record async for record in session.iter_query(args.query, max_results=args.max_results,
+                                                                  with_details=args.details)]
         
         if not data:
             logger.warning("No data found for the given query.")
             return
 
-        if args.format == "csv":
-            # Flatten data for CSV if needed, or just focus on the main fields
-            df = pd.DataFrame(data)
-            # Reorder columns to put basic info first
-            cols = ["name", "lembaga", "unit_kerja", "jabatan", "tanggal_lapor", "jenis_laporan", "total_harta"]
-            other_cols = [c for c in df.columns if c not in cols]
-            df = df[cols + other_cols]
-            df.to_csv(args.output, index=False)
-        else:
-            with open(args.output, "w") as f:
-                json.dump(data, f, indent=4)
+        with scraper.tracer.span("output", records=len(data)):
+            # A json manifest is rewritten with the known reports kept ahead of the new ones.
+            known = list(read_records(args.output)) if manifest_output and os.path.exists(args.output) else []
+            write_records(known + data, args.output, args.format)
+            if known:
+                logger.info(f"Kept {len(known)} known reports in {args.output}.")
             
         logger.info(f"Successfully scraped {len(data)} records. Saved to {args.output}")
         
@@ -0,0 +1,29 @@
+from lhkpn_checkpoint import Checkpoint
+
+KEY = ("PRABOWO SUBIANTO", "2024-12-31", "Khusus, Awal Menjabat")
+
+
+def test_unfinished_crawl_resumes(tmp_path):
+    path = str(tmp_path / "crawl.checkpoint")
+    checkpoint = Checkpoint(path)
+    checkpoint.start("prabowo")
+    checkpoint.record(0, 4, KEY)
+    checkpoint.page_done(0)
+
+    resumed = Checkpoint.load(path)
+    assert not resumed.done("prabowo")
+    assert resumed.start("prabowo")
+    assert (resumed.page, resumed.row, resumed.emitted) == (1, 0, {KEY})
+
+
+def test_finished_crawl_is_not_restarted(tmp_path):
+    path = str(tmp_path / "crawl.checkpoint")
+    checkpoint = Checkpoint(path)
+    checkpoint.start("prabowo")
+    checkpoint.record(0, 0, KEY)
+    checkpoint.finish()
+
+    resumed = Checkpoint.load(path)
+    assert resumed.done("prabowo")
+    assert not resumed.done("gibran")
+    assert resumed.emitted == {KEY}
@@ -0,0 +1,68 @@
+import json
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+from lhkpn_models import ASSET_FIELDS, Report, natural_key, parse_rupiah, parse_tanggal
+
+EXAMPLE = Path(__file__).resolve().parent.parent / "example.json"
+
+
+@pytest.mark.parametrize("text, amount", [
+    ("Rp.2.062.241.012.691", 2062241012691),
+    ("34.448.143.000", 34448143000),
+    ("Rp 1.500.000,00", 1500000),
+    ("1.500.000,50", 1500000),
+    ("(250.000.000)", -250000000),
+    ("-250.000.000", -250000000),
+    ("Rp -250.000.000", -250000000),
+    ("Rp. -250.000.000", -250000000),
+    ("0", 0),
+    (42, 42),
+    ("----", None),
+    ("", None),
+    (None, None),
+])
+def test_parse_rupiah(text, amount):
+    assert parse_rupiah(text) == amount
+
+
+@pytest.mark.parametrize("text, day", [
+    ("31 Desember 2024", date(2024, 12, 31)),
+    ("1 Agt 2023", date(2023, 8, 1)),
+    ("1 Ags. 2023", date(2023, 8, 1)),
+    ("17 agustus 1945", date(1945, 8, 17)),
+    ("5 Mei 2021", date(2021, 5, 5)),
+    ("2024-12-31", date(2024, 12, 31)),
+    (date(2024, 12, 31), date(2024, 12, 31)),
+    ("31 Februari 2024", None),
+    ("31 Decembre 2024", None),
+    ("kemarin", None),
+    (None, None),
+])
+def test_parse_tanggal(text, day):
+    assert parse_tanggal(text) == day
+
+
+def test_report_round_trip_on_example():
+    with open(EXAMPLE) as f:
+        records = json.load(f)
+    for record in records:
+        report = Report.from_dict(record)
+        typed = report.to_dict()
+        assert typed["name"] == record["name"]
+        assert typed["tanggal_lapor"] == parse_tanggal(record["tanggal_lapor"]).isoformat()
+        assert typed["total_harta"] == parse_rupiah(record["total_harta"])
+        for category in ASSET_FIELDS:
+            assert [line["value"] for line in typed[category]] == [parse_rupiah(line["value"]) for line in record[category]]
+        # A typed record parses back to the same report and keeps its natural key.
+        assert Report.from_dict(typed) == report
+        assert Report.from_dict(typed).to_dict() == typed
+        assert natural_key(report) == natural_key(record) == natural_key(typed)
+
+
+def test_unknown_keys_are_kept():
+    record = {"name": "A", "tanggal_lapor": "1 Jan 2020", "query": "a", "modal_sha256": "ab"}
+    assert Report.from_dict(record).to_dict()["query"] == "a"
+    assert Report.from_dict(record).extra == {"query": "a", "modal_sha256": "ab"}
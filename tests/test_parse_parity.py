@@ -0,0 +1,168 @@
+import json
+from pathlib import Path
+from typing import List, Dict
+
+import pytest
+from bs4 import BeautifulSoup
+
+from lhkpn_mock import render_modal
+from lhkpn_parse import PARSER_BACKENDS, parse_detail
+
+ROOT = Path(__file__).resolve().parent.parent
+FIXTURES = sorted((Path(__file__).parent / "fixtures").glob("modal_*.html"))
+
+
+def legacy_parse_detail(html: str) -> Dict[str, List[Dict[str, str]]]:
+    """
+    `LHKPNScraper.parse_detail` as it was before parsing moved to lhkpn_parse, kept verbatim as the reference.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    data = {
+        "tanah_bangunan": [],
+        "transportasi": [],
+        "bergerak_lainnya": [],
+        "surat_berharga": [],
+        "kas": [],
+        "harta_lainnya": [],
+        "hutang": []
+    }
+
+    category_map = {
+        "TANAH DAN BANGUNAN": "tanah_bangunan",
+        "ALAT TRANSPORTASI DAN MESIN": "transportasi",
+        "HARTA BERGERAK LAINNYA": "bergerak_lainnya",
+        "SURAT BERHARGA": "surat_berharga",
+        "KAS DAN SETARA KAS": "kas",
+        "HARTA LAINNYA": "harta_lainnya",
+        "HUTANG": "hutang"
+    }
+
+    current_cat = None
+
+    tbody = soup.find("tbody", class_="data_perbandingan_lhkpn")
+    if not tbody:
+        return data
+
+    rows = tbody.find_all("tr")
+
+    for row in rows:
+        cells = row.find_all(["td", "th"])
+
+        new_cat_found = False
+        if len(cells) >= 3:
+            c1_text = cells[1].get_text(strip=True).upper()
+            c2_text = cells[2].get_text(strip=True).upper()
+
+            for cat_name, key in category_map.items():
+                if cat_name in c2_text or cat_name in row.get_text(" ", strip=True).upper()[:50]:
+                    header_indicators = ["A.", "B.", "C.", "D.", "E.", "F.", "II.", "III."]
+                    if any(ind in c1_text or ind in cells[0].get_text(strip=True).upper() for ind in header_indicators):
+                        current_cat = key
+                        new_cat_found = True
+                        break
+
+        if new_cat_found:
+            continue
+
+        if current_cat:
+            found_index = False
+            desc = ""
+            val = ""
+
+            for j in range(min(len(cells), 4)):
+                cell_text = cells[j].get_text(strip=True)
+                if cell_text and cell_text[0].isdigit() and cell_text.endswith("."):
+                    found_index = True
+                    if j + 1 < len(cells):
+                        desc = cells[j+1].get_text(strip=True)
+                        for k in range(j + 2, len(cells)):
+                            k_text = cells[k].get_text(strip=True)
+                            if k_text and (k_text[0].isdigit() or (len(k_text) > 1 and k_text[0] in "0123456789")):
+                                val = k_text
+                                break
+                    break
+
+            if found_index and desc and val:
+                data[current_cat].append({
+                    "description": desc,
+                    "value": val
+                })
+
+    # Fallback for totals if no detailed list items were found
+    for key in data:
+        if not data[key]:
+            cat_name_search = [k for k, v in category_map.items() if v == key][0]
+            for row in rows:
+                row_text = row.get_text(" ", strip=True).upper()
+                if cat_name_search in row_text:
+                    cells = row.find_all(["td", "th"])
+                    for cell in cells:
+                        cell_text = cell.get_text(strip=True)
+                        if cell_text and any(c.isdigit() for c in cell_text) and cell_text.replace(".", "").replace(",", "").isdigit():
+                            data[key].append({"description": "Total", "value": cell_text})
+                            break
+
+    return data
+
+
+def backend(name: str) -> str:
+    if name == "lxml":
+        pytest.importorskip("lxml")
+    return name
+
+
+def example_modals() -> List[str]:
+    with open(ROOT / "example.json") as f:
+        return [render_modal(record) for record in json.load(f)]
+
+
+@pytest.mark.parametrize("backend_name", sorted(PARSER_BACKENDS))
+@pytest.mark.parametrize("fixture", FIXTURES, ids=lambda path: path.stem)
+def test_saved_modal_matches_legacy_parser(fixture, backend_name):
+    html = fixture.read_text(encoding="utf-8")
+    assert parse_detail(html, backend(backend_name)) == legacy_parse_detail(html)
+
+
+@pytest.mark.parametrize("backend_name", sorted(PARSER_BACKENDS))
+def test_example_modals_match_legacy_parser(backend_name):
+    for html in example_modals():
+        assert parse_detail(html, backend(backend_name)) == legacy_parse_detail(html)
+
+
+def test_comparison_modal_fixture():
+    # Cell text is joined without separators and script text is left out, as get_text(strip=True) does.
+    details = parse_detail((Path(__file__).parent / "fixtures" / "modal_comparison.html").read_text(encoding="utf-8"))
+    assert details["tanah_bangunan"] == [
+        {"description": "Tanah dan Bangunan Seluas 818 m2/580 m2 di KAB / KOTAKOTA JAKARTA SELATAN, HIBAH DENGAN AKTA",
+         "value": "30.448.143.000"},
+        {"description": "Tanah Seluas 48970 m2 di KAB / KOTA BOGOR,HASIL SENDIRI", "value": "10.000.000.000"},
+        {"description": "Tanah dan Bangunan Seluas 70 m2/61 m2 di KAB / KOTA BOGOR, HASIL SENDIRI",
+         "value": "200.000.000"},
+    ]
+    assert details["transportasi"][1] == {"description": "MOTOR, HONDA & YAMAHA Tahun 2015, HASIL SENDIRI",
+                                          "value": "15.000.000"}
+    assert details["bergerak_lainnya"] == [{"description": "Total", "value": "6.010.000.000"}]
+    assert details["hutang"] == [{"description": "Total", "value": "0"}]
+
+
+def test_totals_only_fixture():
+    details = parse_detail((Path(__file__).parent / "fixtures" / "modal_totals_only.html").read_text(encoding="utf-8"))
+    assert details["bergerak_lainnya"] == [{"description": "Total", "value": "25.000.000"}]
+    assert details["harta_lainnya"] == [{"description": "Total", "value": "0"}]
+    assert details["hutang"] == [{"description": "Total", "value": "150.000.000"}]
+
+
+def test_missing_comparison_table():
+    html = (Path(__file__).parent / "fixtures" / "modal_no_comparison.html").read_text(encoding="utf-8")
+    assert all(lines == [] for lines in parse_detail(html).values())
+
+
+def test_lxml_backend_without_lxml_fails_fast(monkeypatch):
+    import lhkpn_parse
+    from lhkpn_scraper import LHKPNScraper
+
+    monkeypatch.setattr(lhkpn_parse, "lxml", None)
+    with pytest.raises(ImportError):
+        LHKPNScraper(parser_backend="lxml")
+    with pytest.raises(ValueError):
+        lhkpn_parse.check_backend("html5lib")
@@ -0,0 +1,63 @@
+import pytest
+
+import lhkpn_ratelimit
+from lhkpn_ratelimit import AdaptiveRateLimiter, retry_after_seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(lhkpn_ratelimit.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_sustained_throttling_lowers_the_rate(clock):
+    limiter = AdaptiveRateLimiter(rate=5.0, max_rate=10.0)
+    rates = []
+    for _ in range(10):
+        # Each second one response gets through before nine are throttled.
+        limiter.observe(latency=0.1, status=200)
+        for _ in range(9):
+            clock[0] += 0.1
+            limiter.observe(latency=0.1, status=429)
+        clock[0] += 0.1
+        rates.append(limiter.rate)
+    assert rates == sorted(rates, reverse=True)
+    assert limiter.rate == limiter.min_rate
+
+
+def test_concurrent_failures_count_once(clock):
+    limiter = AdaptiveRateLimiter(rate=4.0)
+    for _ in range(5):
+        limiter.observe(status=503)
+    assert limiter.rate == 2.0
+    clock[0] += limiter.cooldown
+    limiter.observe(failed=True)
+    assert limiter.rate == 1.0
+
+
+def test_healthy_responses_raise_the_rate_once_per_cooldown(clock):
+    limiter = AdaptiveRateLimiter(rate=2.0, increase=0.5)
+    limiter.observe(status=500)
+    limiter.observe(latency=0.1, status=200)
+    assert limiter.rate == 1.0
+    clock[0] += limiter.cooldown
+    for _ in range(3):
+        limiter.observe(latency=0.1, status=200)
+    assert limiter.rate == 1.5
+    # An increase does not delay the next decrease.
+    limiter.observe(status=429)
+    assert limiter.rate == 0.75
+
+
+def test_slow_responses_lower_the_rate(clock):
+    limiter = AdaptiveRateLimiter(rate=5.0, target_latency=1.0, latency_decrease=0.8, smoothing=1.0)
+    limiter.observe(latency=2.0, status=200)
+    assert limiter.rate == pytest.approx(4.0)
+
+
+def test_retry_after_seconds():
+    assert retry_after_seconds("2") == 2.0
+    assert retry_after_seconds("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert retry_after_seconds("soon") is None
+    assert retry_after_seconds(None) is None
@@ -0,0 +1,33 @@
+from lhkpn_models import natural_key
+from lhkpn_store import SQLiteStore
+
+RECORD = {
+    "name": "Prabowo Subianto",
+    "lembaga": "KANTOR PRESIDEN",
+    "tanggal_lapor": "31 Desember 2024",
+    "jenis_laporan": "Khusus,  Awal Menjabat",
+    "total_harta": "Rp.2.062.241.012.691",
+    "kas": [{"description": "Giro", "value": "21.441.150.025"}],
+}
+
+
+def test_display_columns_keep_the_scraped_text(tmp_path):
+    with SQLiteStore(str(tmp_path / "lhkpn.db")) as store:
+        store.write(RECORD)
+        stored = store.get(natural_key(RECORD))
+    assert stored["name"] == "Prabowo Subianto"
+    assert stored["jenis_laporan"] == "Khusus,  Awal Menjabat"
+    assert stored["tanggal_lapor"] == "2024-12-31"
+    assert stored["total_harta"] == 2062241012691
+
+
+def test_natural_key_deduplicates_differently_spelled_records(tmp_path):
+    with SQLiteStore(str(tmp_path / "lhkpn.db")) as store:
+        store.write(RECORD)
+        store.write(dict(RECORD, name="PRABOWO SUBIANTO ", jenis_laporan="Khusus, Awal Menjabat", kas=[]))
+        assert len(store) == 1
+        assert list(store.keys()) == [natural_key(RECORD)]
+        assert RECORD in store
+        [stored] = store.by_name("prabowo subianto")
+    assert stored["name"] == "PRABOWO SUBIANTO"
+    assert stored["kas"] == [{"description": "Giro", "value": 21441150025}]